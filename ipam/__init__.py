@@ -2,9 +2,12 @@ import collections
 import enum
 import ctypes
 import bisect
+import array
 import socket
 
 from . import nltypes
+from . import nlparse
+from . import trie
 
 
 def remove_l(a, x, lo=None, hi=None):
@@ -85,29 +88,73 @@ def compare(a, b):
     return 0
 
 
-class _rtatb(tuple):
-    __slots__ = ()
+class _rtatb(object):
+    __slots__ = ('_data', '_offs', '_memo')
 
     def __contains__(self, obj):
         try:
-            return None is not self[obj]
+            return 0 != self._offs[obj]
         except IndexError:
             pass
         return False
 
+    def __getitem__(self, obj):
+        off = self._offs[obj]
+        if 0 == off:
+            return None
+        rta_len, _ = nlparse.rtattr.unpack_from(self._data,
+                                                off - nlparse.rtattr.size)
+        return self._data[off:off + rta_len - nlparse.rtattr.size]
+
+    def __len__(self):
+        return len(self._offs)
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self._offs)))
+
+    def __eq__(self, obj):
+        return list(self) == list(obj)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def items(self):
+        yield from ((i, self[i]) for i, off in enumerate(self._offs) if off)
+        return None
+
     def __repr__(self):
         return '{{{!s}}}'.format(', '.join('{!r}: {!r}'.format(i, v)
-                                           for i, v in enumerate(self)
-                                           if None is not v))
+                                           for i, v in self.items()))
+
+    @property
+    def memo(self):
+        if None is self._memo:
+            self._memo = dict()
+        return self._memo
+
+    def __reduce__(self):
+        return (_rtatb_restore, (len(self._offs), self._data))
 
     def __new__(cls, size, rta, n):
-        tb = [None] * size
-        while nltypes.RTA_OK(rta, n):
-            tb[rta.rta_type] = bytes(
-                nltypes.RTA_DATA(rta,
-                                 ctypes.c_ubyte * nltypes.RTA_PAYLOAD(rta)))
-            rta, n = nltypes.RTA_NEXT(rta, n)
-        return tuple.__new__(cls, tb)
+        return cls.from_buffer(
+            size, ctypes.string_at(ctypes.addressof(rta), max(0, n)), 0)
+
+    @classmethod
+    def from_buffer(cls, size, data, off):
+        data = bytes(data[off:])
+        offs = array.array('H' if len(data) <= 0xFFFF else 'I', (0, )) * size
+        for rta_type, start, end in nlparse.iter_rtattr(data, 0):
+            if rta_type < size:
+                offs[rta_type] = start
+        obj = object.__new__(cls)
+        obj._data = data
+        obj._offs = offs
+        obj._memo = None
+        return obj
+
+
+def _rtatb_restore(size, data):
+    return _rtatb.from_buffer(size, data, 0)
 
 
 _ifinfomsg = collections.namedtuple(
@@ -126,7 +173,19 @@ class rtnl_link(comparer, _rtnl_link):
             return diff
         return 0
 
+    @property
+    def key(self):
+        return self.ifi.ifi_index
+
     def __new__(cls, nlh):
+        if isinstance(nlh, nlparse.nlmsg):
+            return _rtnl_link.__new__(
+                cls,
+                ifi=_ifinfomsg._make(
+                    nlparse.ifinfomsg.unpack_from(nlh.data,
+                                                  nltypes.NLMSG_HDRLEN)),
+                rta=_rtatb.from_buffer(1 + nltypes.IFLA_MAX, nlh.data,
+                                       nlparse.IFLA_RTA))
         ifi = nltypes.NLMSG_DATA(nlh, nltypes.c_ifinfomsg)
         obj = _rtnl_link.__new__(
             cls,
@@ -173,7 +232,21 @@ class rtnl_addr(comparer, _rtnl_addr):
             return -diff
         return 0
 
+    @property
+    def key(self):
+        return (self.ifa.ifa_index, self.rta[nltypes.IFA_BROADCAST],
+                self.ifa.ifa_scope, self.ifa.ifa_flags, self.ifa.ifa_family,
+                self.ifa.ifa_prefixlen, self.rta[nltypes.IFA_ADDRESS])
+
     def __new__(cls, nlh):
+        if isinstance(nlh, nlparse.nlmsg):
+            return _rtnl_addr.__new__(
+                cls,
+                ifa=_ifaddrmsg._make(
+                    nlparse.ifaddrmsg.unpack_from(nlh.data,
+                                                  nltypes.NLMSG_HDRLEN)),
+                rta=_rtatb.from_buffer(1 + nltypes.IFA_MAX, nlh.data,
+                                       nlparse.IFA_RTA))
         ifa = nltypes.NLMSG_DATA(nlh, nltypes.c_ifaddrmsg)
         obj = _rtnl_addr.__new__(
             cls,
@@ -182,3 +255,296 @@ class rtnl_addr(comparer, _rtnl_addr):
             rta=_rtatb(1 + nltypes.IFA_MAX, nltypes.IFA_RTA(ifa),
                        nltypes.IFA_PAYLOAD(nlh)))
         return obj
+
+
+class rtnl_addr_view(object):
+    __slots__ = ('_cache', '_index', '_family')
+
+    def __init__(self, cache, index=None, family=None):
+        object.__init__(self)
+        self._cache = cache
+        self._index = index
+        self._family = family
+        return None
+
+    def __iter__(self):
+        return self._cache.iter_addrs(index=self._index, family=self._family)
+
+    def generation(self, ifindex):
+        return self._cache.generation(ifindex)
+
+    def get_addrs(self, ifindex, default=()):
+        if None is not self._index and ifindex not in self._index:
+            return default
+        addrs = self._cache.get_addrs(ifindex)
+        if None is not self._family:
+            addrs = tuple(filter_iter_addr(addrs, family=self._family))
+        return addrs or default
+
+
+class rtnl_changes(object):
+    @staticmethod
+    def _record(tab, key, old, new):
+        try:
+            old, _ = tab[key]
+        except KeyError:
+            pass
+        if None is old and None is new:
+            tab.pop(key, None)
+        else:
+            tab[key] = (old, new)
+        return None
+
+    def link_changed(self, old, new):
+        key = (old if None is new else new).key
+        self._record(self._links, key, old, new)
+        return None
+
+    def addr_changed(self, old, new):
+        key = (old if None is new else new).key
+        self._record(self._addrs, key, old, new)
+        return None
+
+    def link_changes(self):
+        return [self._links[i] for i in sorted(self._links)]
+
+    def addr_changes(self):
+        return sorted(self._addrs.values(),
+                      key=lambda _: (_[1] if None is _[0] else _[0]).key[0])
+
+    def index(self):
+        index = set(self._links)
+        index.update(ifindex for ifindex, *_ in self._addrs)
+        return index
+
+    @property
+    def deleted(self):
+        return set(i for i, (_, new) in self._links.items() if None is new)
+
+    def filter(self, index=None, family=None):
+        obj = rtnl_changes(self._cache, family=family)
+        obj._links.update((i, _) for i, _ in self._links.items()
+                          if None is index or i in index)
+        obj._addrs.update(
+            (k, (old, new)) for k, (old, new) in self._addrs.items()
+            if None is index or k[0] in index
+            if None is family or k[4] in family)
+        return obj
+
+    def items(self):
+        index = self.index()
+        deleted = self.deleted
+        links = (self._cache.get_link(i) if i not in deleted else
+                 self._links[i][0] for i in sorted(index))
+        links = (_ for _ in links if None is not _)
+        addrs = rtnl_addr_view(self._cache,
+                               index=index - deleted,
+                               family=self._family)
+        return (links, addrs)
+
+    def __bool__(self):
+        return bool(self._links or self._addrs)
+
+    def __init__(self, cache, family=None):
+        object.__init__(self)
+        self._cache = cache
+        self._family = family
+        self._links = dict()
+        self._addrs = dict()
+        return None
+
+
+class rtnl_cache(object):
+    def _touch(self, ifindex):
+        self._serial += 1
+        self._gen[ifindex] = self._serial
+        return None
+
+    def generation(self, ifindex):
+        return self._gen.get(ifindex, 0)
+
+    def count_links(self):
+        return len(self._links)
+
+    def count_addrs(self):
+        return sum(map(len, self._addrs.values()))
+
+    def _drop_name(self, ifindex):
+        name = self._ifnames.pop(ifindex, None)
+        if None is not name and ifindex == self._names.get(name):
+            del self._names[name]
+        return None
+
+    def _set_name(self, link):
+        name = link.rta[nltypes.IFLA_IFNAME]
+        if None is not name:
+            name = ctypes.string_at(name).decode()
+        if name == self._ifnames.get(link.key):
+            return None
+        self._drop_name(link.key)
+        if None is not name:
+            self._names[name] = link.key
+            self._ifnames[link.key] = name
+        return None
+
+    def add_link(self, link):
+        self._touch(link.key)
+        old = self._links.get(link.key)
+        if None is old:
+            bisect.insort(self._link_index, link.key)
+        self._links[link.key] = link
+        self._set_name(link)
+        if None is not self._changes:
+            self._changes.link_changed(old, link)
+        return None
+
+    def remove_link(self, link):
+        old = self._links.pop(link.key, None)
+        if None is not old:
+            self._touch(link.key)
+            remove_l(self._link_index, link.key)
+            self._drop_name(link.key)
+            if None is not self._changes:
+                self._changes.link_changed(old, None)
+        return None
+
+    def add_addr(self, addr):
+        ifindex = addr.ifa.ifa_index
+        try:
+            bucket = self._addrs[ifindex]
+        except KeyError:
+            bucket = self._addrs[ifindex] = dict()
+            bisect.insort(self._addr_index, ifindex)
+        old = bucket.get(addr.key)
+        bucket[addr.key] = addr
+        self._addr_order.pop(ifindex, None)
+        self._touch(ifindex)
+        if None is not self._lpm:
+            self._lpm.add_addr(addr)
+        if None is not self._changes:
+            self._changes.addr_changed(old, addr)
+        return None
+
+    def remove_addr(self, addr):
+        ifindex = addr.ifa.ifa_index
+        bucket = self._addrs.get(ifindex)
+        old = None if None is bucket else bucket.pop(addr.key, None)
+        if None is old:
+            return None
+        self._addr_order.pop(ifindex, None)
+        self._touch(ifindex)
+        if None is not self._lpm:
+            self._lpm.remove_addr(old)
+        if None is not self._changes:
+            self._changes.addr_changed(old, None)
+        if not bucket:
+            del self._addrs[ifindex]
+            remove_l(self._addr_index, ifindex)
+        return None
+
+    def get_link(self, ifindex):
+        return self._links.get(ifindex)
+
+    def find_index(self, index=None, ifname=None):
+        if None is not ifname:
+            found = set(self._names[name] for name in ifname
+                        if name in self._names)
+            if None is not index:
+                found = set(i for i in found if i in index)
+            return found
+        if None is index:
+            return set(self._links)
+        return set(i for i in index if i in self._links)
+
+    def get_addrs(self, ifindex):
+        try:
+            return self._addr_order[ifindex]
+        except KeyError:
+            pass
+        bucket = self._addrs.get(ifindex)
+        if not bucket:
+            return ()
+        addrs = self._addr_order[ifindex] = tuple(sorted(bucket.values()))
+        return addrs
+
+    def iter_links(self, index=None):
+        links = self._links
+        if None is index:
+            yield from (links[i] for i in self._link_index)
+        elif len(index) < len(links):
+            yield from (links[i] for i in sorted(index) if i in links)
+        else:
+            yield from (links[i] for i in self._link_index if i in index)
+        return None
+
+    def iter_addrs(self, index=None, family=None):
+        if None is index:
+            index = self._links
+            addr_index = self._addr_index
+        elif len(index) < len(self._addr_index):
+            addr_index = sorted(i for i in index if i in self._addrs)
+        else:
+            addr_index = self._addr_index
+        for i in addr_index:
+            if i not in index:
+                continue
+            if None is family:
+                yield from self.get_addrs(i)
+            else:
+                yield from filter_iter_addr(self.get_addrs(i), family=family)
+        return None
+
+    def items(self, index=None, family=None):
+        return (self.iter_links(index=index),
+                rtnl_addr_view(self, index=index, family=family))
+
+    def lookup(self, address):
+        if None is self._lpm:
+            raise ValueError
+        return self._lpm.lookup(address)
+
+    def covered_by(self, prefix):
+        if None is self._lpm:
+            raise ValueError
+        return self._lpm.covered_by(prefix)
+
+    def pop_changes(self):
+        if None is self._changes:
+            raise ValueError
+        changes = self._changes
+        self._changes = rtnl_changes(self)
+        return changes
+
+    def clear(self):
+        if None is not self._changes:
+            for link in self._links.values():
+                self._changes.link_changed(link, None)
+            for bucket in self._addrs.values():
+                for addr in bucket.values():
+                    self._changes.addr_changed(addr, None)
+        self._links.clear()
+        self._link_index.clear()
+        self._addrs.clear()
+        self._addr_index.clear()
+        self._addr_order.clear()
+        self._gen.clear()
+        self._names.clear()
+        self._ifnames.clear()
+        if None is not self._lpm:
+            self._lpm.clear()
+        return None
+
+    def __init__(self, track=False, lpm=False):
+        object.__init__(self)
+        self._changes = rtnl_changes(self) if track else None
+        self._lpm = trie.addr_trie() if lpm else None
+        self._links = dict()
+        self._link_index = list()
+        self._addrs = dict()
+        self._addr_index = list()
+        self._addr_order = dict()
+        self._gen = dict()
+        self._names = dict()
+        self._ifnames = dict()
+        self._serial = 0
+        return None
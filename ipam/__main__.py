@@ -1,52 +1,154 @@
 import sys
 import os
+import io
+import stat
 import functools
+import multiprocessing
+import concurrent.futures
 import asyncio
-import json
+import socket
+import struct
+import hashlib
+import logging
 import argparse
 
-from . import nltypes
+from . import nlparse
 from . import utils
 from . import recvs
 from . import dumps
 from . import prints
+from . import snapshot
+from . import journal
+from . import replay
+from . import metrics
+from . import netns
+
+
+logger = logging.getLogger(__package__)
 
 
 async def print_raw(link_list,
                     addr_list,
                     *,
+                    changes=None,
+                    cache=None,
                     file=sys.stdout,
                     loop=None):
     file = file.buffer
-    for chunk in dumps.iterencode(link_list, addr_list):
+    if None is changes:
+        chunks = dumps.iterencode(link_list, addr_list)
+    else:
+        chunks = dumps.iterencode_changes(changes)
+    for chunk in chunks:
         file.write(chunk)
     return None
 
 
+async def print_snapshot(link_list,
+                         addr_list,
+                         *,
+                         changes=None,
+                         cache=None,
+                         file=sys.stdout,
+                         loop=None):
+    file = file.buffer
+    for chunk in snapshot.iterencode(link_list, addr_list):
+        file.write(chunk)
+    return None
+
+
+def _iterencode_json(blocks, indent=4):
+    if None is indent:
+        head, sep, tail = '[', ', ', ']'
+    else:
+        head, sep, tail = '[\n', ',\n', '\n]'
+    blocks = iter(blocks)
+    for block in blocks:
+        yield head
+        yield block
+        break
+    else:
+        yield '[]'
+        return None
+    for block in blocks:
+        yield sep
+        yield block
+    yield tail
+    return None
+
+
+async def _render(render, link_list, addr_list, brief, changes, cache, loop):
+    deleted = ()
+    if None is not changes:
+        link_list, addr_list = changes.items()
+        deleted = changes.deleted
+    if None is cache:
+        linkinfos = utils.iter_linkinfo(
+            link_list, addr_list, brief=brief, deleted=deleted)
+        return map(render, linkinfos)
+    return await cache.render(render, link_list, addr_list, brief=brief,
+                              deleted=deleted, loop=loop)
+
+
 async def print_json(link_list,
                      addr_list,
                      *,
                      brief=False,
+                     changes=None,
+                     cache=None,
+                     indent=4,
                      file=sys.stdout,
                      end='',
                      loop=None):
-    linkinfos = utils.iter_linkinfo(link_list, addr_list, brief=brief)
-    json.dump(list(linkinfos), file, indent=4)
+    blocks = await _render(
+        functools.partial(prints.encode_json_linkinfo, indent=indent),
+        link_list, addr_list, brief, changes, cache, loop)
+    for chunk in _iterencode_json(blocks, indent=indent):
+        file.write(chunk)
     if end:
         file.write(end)
     return None
 
 
+async def print_ndjson(link_list,
+                       addr_list,
+                       *,
+                       brief=False,
+                       changes=None,
+                       cache=None,
+                       file=sys.stdout,
+                       loop=None):
+    blocks = await _render(prints.encode_ndjson_linkinfo,
+            link_list, addr_list, brief, changes, cache, loop)
+    for block in blocks:
+        file.write(block)
+        file.write('\n')
+    return None
+
+
 async def print_tile(link_list,
                      addr_list,
                      *,
                      brief=False,
+                     changes=None,
+                     cache=None,
                      file=sys.stdout,
                      end='',
                      loop=None):
-    linkinfos = utils.iter_linkinfo(link_list, addr_list, brief=brief)
-    for chunk in prints.iterencode(linkinfos, brief=brief):
-        file.write(chunk)
+    if None is cache:
+        deleted = ()
+        if None is not changes:
+            link_list, addr_list = changes.items()
+            deleted = changes.deleted
+        linkinfos = utils.iter_linkinfo(
+            link_list, addr_list, brief=brief, deleted=deleted)
+        for chunk in prints.iterencode(linkinfos, brief=brief):
+            file.write(chunk)
+    else:
+        blocks = await _render(
+            functools.partial(prints.encode_linkinfo, brief=brief),
+            link_list, addr_list, brief, changes, cache, loop)
+        file.write('\n'.join(blocks))
     if end:
         file.write(end)
     return None
@@ -55,7 +157,27 @@ async def print_tile(link_list,
 _DEFAULT_PRINTER = print_tile
 
 
-async def h_file(filename, link_list, addr_list, *, printer=None, loop=None):
+def _digest_file(filename):
+    try:
+        fileobj = open(filename, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        digest = hashlib.sha256()
+        for chunk in iter(functools.partial(fileobj.read, 65536), b''):
+            digest.update(chunk)
+    finally:
+        fileobj.close()
+    return digest.digest()
+
+
+async def h_file(filename,
+                 link_list,
+                 addr_list,
+                 *,
+                 changes=None,
+                 printer=None,
+                 loop=None):
     if None is loop:
         loop = asyncio.get_event_loop()
     if None is printer:
@@ -68,7 +190,77 @@ async def h_file(filename, link_list, addr_list, *, printer=None, loop=None):
     return None
 
 
-async def h_exec(args, link_list, addr_list, *, printer=None, loop=None):
+class file_consumer(object):
+    async def _render(self, link_list, addr_list, loop):
+        buf = io.BytesIO()
+        fileobj = io.TextIOWrapper(buf, encoding='utf-8')
+        try:
+            await self._printer(link_list, addr_list, file=fileobj, loop=loop)
+            fileobj.flush()
+        finally:
+            fileobj.detach()
+        return buf.getvalue()
+
+    def _replace(self, payload):
+        dirname, basename = os.path.split(self._filename)
+        tmpname = os.path.join(
+            dirname, '.{}.{}.tmp'.format(basename, os.getpid()))
+        fileobj = open(tmpname, 'wb')
+        try:
+            try:
+                fileobj.write(payload)
+                fileobj.flush()
+                os.fsync(fileobj.fileno())
+            finally:
+                fileobj.close()
+            try:
+                os.chmod(tmpname,
+                         stat.S_IMODE(os.stat(self._filename).st_mode))
+            except FileNotFoundError:
+                pass
+            os.replace(tmpname, self._filename)
+        except BaseException:
+            try:
+                os.unlink(tmpname)
+            except FileNotFoundError:
+                pass
+            raise
+        return None
+
+    async def __call__(self,
+                       link_list,
+                       addr_list,
+                       *,
+                       changes=None,
+                       loop=None):
+        if None is loop:
+            loop = asyncio.get_event_loop()
+        payload = await self._render(link_list, addr_list, loop)
+        digest = hashlib.sha256(payload).digest()
+        if digest == self._digest:
+            return None
+        self._replace(payload)
+        self._digest = digest
+        return None
+
+    def __init__(self, filename, *, printer=None):
+        object.__init__(self)
+        if None is printer:
+            printer = _DEFAULT_PRINTER
+        self._filename = filename
+        self._printer = printer
+        self._digest = _digest_file(filename)
+        return None
+
+
+async def h_exec(args,
+                 link_list,
+                 addr_list,
+                 *,
+                 changes=None,
+                 printer=None,
+                 env=None,
+                 loop=None):
     if None is loop:
         loop = asyncio.get_event_loop()
     if None is printer:
@@ -78,12 +270,16 @@ async def h_exec(args, link_list, addr_list, *, printer=None, loop=None):
     fp_w = os.fdopen(fd_w, 'w')
     try:
         proc = await asyncio.create_subprocess_exec(
-            *args, stdin=fp_r, stdout=None, loop=loop)
+            *args, stdin=fp_r, stdout=None, env=env, loop=loop)
     finally:
         fp_r.close()
     try:
         try:
-            await printer(link_list, addr_list, file=fp_w)
+            if None is changes:
+                await printer(link_list, addr_list, file=fp_w)
+            else:
+                await printer(
+                    link_list, addr_list, changes=changes, file=fp_w)
         finally:
             fp_w.close()
     except Exception:
@@ -98,28 +294,182 @@ async def h_exec(args, link_list, addr_list, *, printer=None, loop=None):
     return None
 
 
+EXEC_CLOSE_TIMEOUT = 5
+
+
+class exec_consumer(object):
+    async def _spawn(self, loop):
+        self._proc = await asyncio.create_subprocess_exec(
+            *self._args, stdin=asyncio.subprocess.PIPE, stdout=None,
+            env=self._env, loop=loop)
+        return None
+
+    async def _restart(self, loop):
+        proc = self._proc
+        if None is not proc:
+            if None is proc.returncode:
+                proc.terminate()
+            returncode = await proc.wait()
+            logger.warning('exec consumer exited with %d, restarting',
+                    returncode)
+        await self._spawn(loop)
+        return None
+
+    async def _render(self, link_list, addr_list, changes, loop):
+        buf = io.BytesIO()
+        fileobj = io.TextIOWrapper(buf, encoding='utf-8')
+        try:
+            if None is changes:
+                await self._printer(
+                    link_list, addr_list, file=fileobj, loop=loop)
+            else:
+                await self._printer(link_list, addr_list,
+                        changes=changes, file=fileobj, loop=loop)
+            fileobj.flush()
+        finally:
+            fileobj.detach()
+        payload = buf.getvalue()
+        if 'ndjson' == self._framing:
+            return payload + b'\n'
+        return struct.pack('!I', len(payload)) + payload
+
+    async def _write(self, frame):
+        self._proc.stdin.write(frame)
+        await self._proc.stdin.drain()
+        return None
+
+    async def __call__(self,
+                       link_list,
+                       addr_list,
+                       *,
+                       changes=None,
+                       loop=None):
+        if None is loop:
+            loop = asyncio.get_event_loop()
+        proc = self._proc
+        if None is proc or None is not proc.returncode:
+            await self._restart(loop)
+            changes = None
+        frame = await self._render(link_list, addr_list, changes, loop)
+        try:
+            await self._write(frame)
+        except (BrokenPipeError, ConnectionResetError):
+            await self._restart(loop)
+            if None is not changes:
+                frame = await self._render(link_list, addr_list, None, loop)
+            await self._write(frame)
+        return None
+
+    async def close(self, timeout=EXEC_CLOSE_TIMEOUT):
+        proc = self._proc
+        if None is proc:
+            return None
+        self._proc = None
+        loop = asyncio.get_event_loop()
+        if None is proc.returncode:
+            proc.stdin.close()
+        for stop in (proc.terminate, proc.kill):
+            try:
+                await asyncio.wait_for(proc.wait(), timeout, loop=loop)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                return None
+            logger.warning('exec consumer did not exit in %gs, stopping',
+                    timeout)
+            try:
+                stop()
+            except ProcessLookupError:
+                pass
+        await proc.wait()
+        return None
+
+    def __init__(self, args, *, printer=None, framing='length', env=None):
+        object.__init__(self)
+        if framing not in ('length', 'ndjson'):
+            raise ValueError
+        if None is printer:
+            printer = _DEFAULT_PRINTER
+        self._args = tuple(args)
+        self._printer = printer
+        self._framing = framing
+        self._env = env
+        self._proc = None
+        return None
+
+
+async def run_with_consumer(core, consumer):
+    try:
+        await core
+    finally:
+        await consumer.close()
+    return None
+
+
+async def _timed_callback(callback, metrics, loop, *args, **kwargs):
+    t = loop.time()
+    try:
+        await callback(*args, **kwargs)
+    finally:
+        metrics.observe('callback', loop.time() - t)
+    return None
+
+
 async def monitor(callback, downtime=None,
-        index=None, ifname=None, family=None, *, oneshot=False, loop=None):
+        index=None, ifname=None, family=None, *, rcvbuf=None, batch=False,
+        parser=None, parallel=False, delta=False, journal=None,
+        sock=None, metrics=None, oneshot=False, loop=None):
     if None is loop:
         loop = asyncio.get_event_loop()
+    if None is not metrics:
+        callback = functools.partial(_timed_callback, callback, metrics, loop)
     if None is downtime or not isinstance(downtime, int):
         downtime = 0
+    sub = recvs.rtnl_groups(family)
+    if None is not sock and socket.AF_NETLINK == sock.family:
+        sub = None
     rth = recvs.Handle(
-        nltypes.RTMGRP_LINK | nltypes.RTMGRP_IPV4_IFADDR
-        | nltypes.RTMGRP_IPV6_IFADDR,
+        sub,
+        sock=sock,
+        rcvbuf=rcvbuf,
+        batch=batch,
+        parser=parser,
+        index=index,
+        ifname=ifname,
+        family=family,
+        parallel=parallel,
+        delta=delta,
+        journal=journal,
+        metrics=metrics,
         loop=loop)
     try:
-        while True:
-            await rth.update()
-            if 0 < downtime:
+        eof = False
+        while not eof:
+            try:
+                await rth.update()
+            except EOFError:
+                eof = True
+            if 0 < downtime and not eof:
                 while True:
                     try:
                         await asyncio.wait_for(
                             rth.update(False), downtime, loop=loop)
                     except asyncio.TimeoutError:
                         break
-            links, addrs = rth.items(index=index, ifname=ifname, family=family)
-            await callback(links, addrs)
+                    except EOFError:
+                        eof = True
+                        break
+            if delta:
+                changes = rth.changes(
+                    index=index, ifname=ifname, family=family)
+                if changes:
+                    links, addrs = rth.items(
+                        index=index, ifname=ifname, family=family)
+                    await callback(links, addrs, changes=changes)
+            else:
+                links, addrs = rth.items(
+                    index=index, ifname=ifname, family=family)
+                await callback(links, addrs)
             if oneshot:
                 break
     finally:
@@ -127,36 +477,252 @@ async def monitor(callback, downtime=None,
     return None
 
 
+async def _monitor_in_netns(sock, callback, downtime, index, ifname, family,
+        *, loop, **kwargs):
+    try:
+        sock.setblocking(False)
+        await monitor(callback, downtime, index, ifname, family, sock=sock,
+                loop=loop, **kwargs)
+    finally:
+        sock.close()
+        close = getattr(callback, 'close', None)
+        if None is not close:
+            await close()
+    return None
+
+
+async def _stop_netns_task(name, task):
+    if not task.done():
+        task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        logger.error('netns %s: %r', name, e)
+    return None
+
+
+async def monitor_netns(make_callback, downtime=None,
+        index=None, ifname=None, family=None, *, rcvbuf=None, batch=False,
+        parser=None, delta=False, netns_dir=netns.NETNS_RUN_DIR, pids=(),
+        interval=5, loop=None):
+    if None is loop:
+        loop = asyncio.get_event_loop()
+    tasks = dict()
+    try:
+        while True:
+            seen = set()
+            for name, path in netns.iter_netns(netns_dir, pids):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                key = (name, st.st_dev, st.st_ino)
+                seen.add(key)
+                if key not in tasks:
+                    logger.info('netns %s: monitoring', name)
+                else:
+                    task = tasks[key]
+                    if None is task or not task.done():
+                        continue
+                    await _stop_netns_task(name, task)
+                try:
+                    sock = netns.nl_open_in_netns(
+                        path, sub=recvs.rtnl_groups(family), rcvbuf=rcvbuf)
+                except OSError as e:
+                    logger.error('netns %s: %s, skipped', name, e)
+                    tasks[key] = None
+                    continue
+                tasks[key] = loop.create_task(_monitor_in_netns(
+                    sock, make_callback(name), downtime, index, ifname,
+                    family, batch=batch, parser=parser, delta=delta,
+                    loop=loop))
+            for key in [key for key in tasks if key not in seen]:
+                logger.info('netns %s: gone', key[0])
+                task = tasks.pop(key)
+                if None is not task:
+                    await _stop_netns_task(key[0], task)
+            await asyncio.sleep(interval, loop=loop)
+    finally:
+        for key, task in tasks.items():
+            if None is not task:
+                await _stop_netns_task(key[0], task)
+    return None
+
+
 printers = {
         'full': print_tile,
         'brief': functools.partial(print_tile, brief=True),
         'json': print_json,
         'json-brief': functools.partial(print_json, brief=True),
+        'ndjson': print_ndjson,
+        'ndjson-brief': functools.partial(print_ndjson, brief=True),
         'raw': print_raw,
+        'snapshot': print_snapshot,
         }
 
 
+families = {
+        'inet': socket.AF_INET,
+        'inet6': socket.AF_INET6,
+        }
+
+
+def _make_callback(namespace, printer, name=None, *, executor=None):
+    if None is executor:
+        cache = utils.render_cache()
+    else:
+        cache = utils.render_pool(executor)
+    printer = functools.partial(printer, cache=cache)
+    env = None
+    if None is not name:
+        env = dict(os.environ, IPAM_NETNS=name)
+    if 'file' == namespace.action:
+        filename = namespace.file
+        if None is not name:
+            filename = filename.replace('{netns}', name)
+        if namespace.atomic:
+            return file_consumer(filename, printer=printer)
+        return functools.partial(h_file, filename, printer=printer)
+    elif 'exec' == namespace.action and namespace.persistent:
+        return exec_consumer(namespace.args, printer=printer,
+                framing=namespace.framing, env=env)
+    elif 'exec' == namespace.action:
+        return functools.partial(
+            h_exec, namespace.args, printer=printer, env=env)
+    raise ValueError
+
+
 def main(args=None, namespace=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('-d', '--downtime', type=int)
     parser.add_argument('-i', '--interface', action='append')
+    parser.add_argument('-f', '--family', action='append',
+            choices=families.keys())
     parser.add_argument('-o', '--output',
             choices=printers.keys())
+    parser.add_argument('--delta', action='store_true')
+    parser.add_argument('--rcvbuf', type=int)
+    parser.add_argument('--batch', action='store_true')
+    parser.add_argument('--parser', choices=nlparse.parsers.keys())
+    parser.add_argument('--parallel', action='store_true')
+    parser.add_argument('--record')
+    parser.add_argument('--record-max-bytes', type=int)
+    parser.add_argument('--record-backups', type=int)
+    parser.add_argument('--replay')
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--metrics-textfile')
+    parser.add_argument('--metrics-interval', type=float, default=15)
+    parser.add_argument('--all-netns', action='store_true')
+    parser.add_argument('--netns-dir', default=netns.NETNS_RUN_DIR)
+    parser.add_argument('--netns-pid', type=int, action='append')
+    parser.add_argument('--netns-interval', type=float, default=5)
+    parser.add_argument('--render-workers', type=int)
     subparsers = parser.add_subparsers(required=True, dest='action')
-    subparsers.add_parser('file').add_argument('file')
-    subparsers.add_parser('exec').add_argument('args', nargs='*')
+    file_parser = subparsers.add_parser('file')
+    file_parser.add_argument('--atomic', action='store_true')
+    file_parser.add_argument('file')
+    exec_parser = subparsers.add_parser('exec')
+    exec_parser.add_argument('--persistent', action='store_true')
+    exec_parser.add_argument('--framing', default='length',
+            choices=('length', 'ndjson'))
+    exec_parser.add_argument('args', nargs='*')
     namespace = parser.parse_args(args=args, namespace=namespace)
-    printer = None if None is namespace.output else printers[namespace.output]
-    if 'file' == namespace.action:
-        callback = functools.partial(
-            h_file, namespace.file, printer=printer)
-    elif 'exec' == namespace.action:
-        callback = functools.partial(
-            h_exec, namespace.args, printer=printer)
+    if None is namespace.output:
+        printer = _DEFAULT_PRINTER
     else:
-        raise ValueError
-    core = monitor(callback, namespace.downtime, ifname=namespace.interface)
-    asyncio.run(core)
+        printer = printers[namespace.output]
+    if 'exec' == namespace.action and 'ndjson' == namespace.framing:
+        if None is namespace.output:
+            printer = print_json
+        elif namespace.output not in ('json', 'json-brief'):
+            parser.error('--framing ndjson needs a json output')
+        printer = functools.partial(printer, indent=None)
+    family = None
+    if None is not namespace.family:
+        family = set(families[name] for name in namespace.family)
+    executor = None
+    if namespace.render_workers:
+        executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=namespace.render_workers,
+                mp_context=multiprocessing.get_context('forkserver'))
+        # start the workers before the event loop and sockets exist
+        executor.submit(int).result()
+    try:
+        _run(parser, namespace, printer, family, executor)
+    finally:
+        if None is not executor:
+            executor.shutdown()
+    return None
+
+
+def _run(parser, namespace, printer, family, executor):
+    if namespace.all_netns or namespace.netns_pid:
+        if 'file' == namespace.action and '{netns}' not in namespace.file:
+            parser.error('file needs a {netns} field with --all-netns')
+        for option in ('parallel', 'record', 'replay', 'metrics_textfile'):
+            if getattr(namespace, option):
+                parser.error('--{} is not supported with --all-netns'
+                        .format(option.replace('_', '-')))
+        netns_dir = None
+        if namespace.all_netns:
+            netns_dir = namespace.netns_dir
+        core = monitor_netns(
+                functools.partial(_make_callback, namespace, printer,
+                    executor=executor),
+                namespace.downtime, ifname=namespace.interface,
+                family=family, rcvbuf=namespace.rcvbuf,
+                batch=namespace.batch, parser=namespace.parser,
+                delta=namespace.delta, netns_dir=netns_dir,
+                pids=namespace.netns_pid or (),
+                interval=namespace.netns_interval)
+        asyncio.run(core)
+        return None
+    callback = _make_callback(namespace, printer, executor=executor)
+    consumer = None
+    if isinstance(callback, exec_consumer):
+        consumer = callback
+    recorder = None
+    if None is not namespace.record:
+        recorder = journal.journal(namespace.record,
+                max_bytes=namespace.record_max_bytes,
+                backup_count=namespace.record_backups)
+    collector = None
+    if None is not namespace.metrics_textfile:
+        collector = metrics.metrics()
+    sock = None
+    if None is not namespace.replay:
+        sock, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        sock.setblocking(False)
+        peer.setblocking(False)
+        replayfile = open(namespace.replay, 'rb')
+    core = monitor(callback, namespace.downtime, ifname=namespace.interface,
+            family=family,
+            rcvbuf=namespace.rcvbuf, batch=namespace.batch,
+            parser=namespace.parser, parallel=namespace.parallel,
+            delta=namespace.delta, journal=recorder, sock=sock,
+            metrics=collector)
+    if None is not sock:
+        maxsize = recvs.NL_QUEUE_RECV_BUFSIZE
+        if namespace.batch:
+            maxsize = recvs.NL_RECV_BUFSIZE
+        core = replay.replay_into(core,
+                journal.iter_journal(replayfile), peer,
+                speed=namespace.speed, maxsize=maxsize)
+    if None is not collector:
+        core = metrics.run_with_textfile(core, collector,
+                namespace.metrics_textfile, namespace.metrics_interval)
+    if None is not consumer:
+        core = run_with_consumer(core, consumer)
+    try:
+        asyncio.run(core)
+    finally:
+        if None is not recorder:
+            recorder.close()
+        if None is not sock:
+            sock.close()
+            replayfile.close()
     return None
 
 
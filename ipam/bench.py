@@ -0,0 +1,288 @@
+__all__ = ('benchmarks', 'run', 'compare', 'main')
+
+import sys
+import io
+import os
+import time
+import json
+import random
+import asyncio
+import platform
+import tempfile
+import functools
+import argparse
+
+from . import add_l, remove_l, rtnl_addr, rtnl_link, rtnl_cache
+from . import nltypes
+from . import nlparse
+from . import utils
+from . import dumps
+from . import prints
+from . import load
+from . import workload
+
+
+class tables(object):
+    def parse(self, iter_nlmsg):
+        links = list()
+        addrs = list()
+        for msg in iter_nlmsg(self.data):
+            if nltypes.RTM_NEWLINK == msg.nlmsg_type:
+                links.append(rtnl_link(msg))
+            elif nltypes.RTM_NEWADDR == msg.nlmsg_type:
+                addrs.append(rtnl_addr(msg))
+        return links, addrs
+
+    @property
+    def filename(self):
+        if None is self._filename:
+            fd, self._filename = tempfile.mkstemp(suffix='.bin')
+            try:
+                os.write(fd, self.data)
+            finally:
+                os.close(fd)
+        return self._filename
+
+    def close(self):
+        if None is not self._filename:
+            os.unlink(self._filename)
+            self._filename = None
+        return None
+
+    def __init__(self, nlinks, naddrs, seed=0):
+        object.__init__(self)
+        self.data = b''.join(
+            workload.workload(nlinks, naddrs, seed=seed).iter_dump())
+        self.links, self.addrs = self.parse(nlparse.iter_nlmsg)
+        self.links.sort()
+        self.addrs.sort()
+        self.linkinfos = list(utils.iter_linkinfo(self.links, self.addrs))
+        self._filename = None
+        return None
+
+
+def bench_parse_ctypes(t):
+    return (len(t.links) + len(t.addrs),
+            functools.partial(t.parse, nlparse.iter_c_nlmsghdr))
+
+
+def bench_parse_struct(t):
+    return (len(t.links) + len(t.addrs),
+            functools.partial(t.parse, nlparse.iter_nlmsg))
+
+
+def _churn_sample(t, seed=0):
+    items = t.links + t.addrs
+    return random.Random(seed).sample(items, max(1, len(items) // 10))
+
+
+def _list_churn(t, sample):
+    link_list = list(t.links)
+    addr_list = list(t.addrs)
+    for x in sample:
+        remove_l(link_list if isinstance(x, rtnl_link) else addr_list, x)
+    for x in sample:
+        add_l(link_list if isinstance(x, rtnl_link) else addr_list, x)
+    return None
+
+
+def bench_list_churn(t):
+    sample = _churn_sample(t)
+    return 2 * len(sample), functools.partial(_list_churn, t, sample)
+
+
+def _cache_churn(cache, sample):
+    for x in sample:
+        if isinstance(x, rtnl_link):
+            cache.remove_link(x)
+            cache.add_link(x)
+        else:
+            cache.remove_addr(x)
+            cache.add_addr(x)
+    return None
+
+
+def bench_cache_churn(t):
+    sample = _churn_sample(t)
+    cache = rtnl_cache()
+    for x in t.links:
+        cache.add_link(x)
+    for x in t.addrs:
+        cache.add_addr(x)
+    return 2 * len(sample), functools.partial(_cache_churn, cache, sample)
+
+
+def _iter_linkinfo(t):
+    return list(utils.iter_linkinfo(t.links, t.addrs))
+
+
+def bench_iter_linkinfo(t):
+    return len(t.links), functools.partial(_iter_linkinfo, t)
+
+
+def _prints_iterencode(t):
+    return ''.join(prints.iterencode(t.linkinfos))
+
+
+def bench_prints_iterencode(t):
+    return len(t.links), functools.partial(_prints_iterencode, t)
+
+
+def _print_json(t):
+    from .__main__ import print_json
+    return asyncio.run(print_json(t.links, t.addrs, file=io.StringIO()))
+
+
+def bench_print_json(t):
+    return len(t.links), functools.partial(_print_json, t)
+
+
+def _dumps_iterencode(t):
+    return b''.join(dumps.iterencode(t.links, t.addrs))
+
+
+def bench_dumps_iterencode(t):
+    return (len(t.links) + len(t.addrs),
+            functools.partial(_dumps_iterencode, t))
+
+
+def _load_main(t, args):
+    return load.main(['-f', t.filename] + args, outfile=io.StringIO())
+
+
+def bench_load_main(t):
+    return len(t.links) + len(t.addrs), functools.partial(_load_main, t, [])
+
+
+def bench_load_main_json(t):
+    return (len(t.links) + len(t.addrs),
+            functools.partial(_load_main, t, ['-j']))
+
+
+benchmarks = {
+        'parse-ctypes': bench_parse_ctypes,
+        'parse-struct': bench_parse_struct,
+        'list-churn': bench_list_churn,
+        'cache-churn': bench_cache_churn,
+        'iter_linkinfo': bench_iter_linkinfo,
+        'prints.iterencode': bench_prints_iterencode,
+        'print_json': bench_print_json,
+        'dumps.iterencode': bench_dumps_iterencode,
+        'load.main': bench_load_main,
+        'load.main-json': bench_load_main_json,
+        }
+
+
+def _best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        t = time.perf_counter() - t
+        if None is best or t < best:
+            best = t
+    return best
+
+
+def run(names=None, sizes=(100, 1000, 10000), naddrs=4, repeat=3, seed=0):
+    if None is names:
+        names = list(benchmarks)
+    results = list()
+    for size in sizes:
+        t = tables(size, naddrs, seed=seed)
+        try:
+            for name in names:
+                items, func = benchmarks[name](t)
+                seconds = _best_of(func, repeat)
+                results.append({
+                    'name': name,
+                    'links': size,
+                    'addrs': size * naddrs,
+                    'items': items,
+                    'seconds': seconds,
+                    'rate': items / seconds if 0 < seconds else None,
+                })
+        finally:
+            t.close()
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'naddrs': naddrs,
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(baseline, report, threshold=1.1):
+    old = dict(((r['name'], r['links']), r) for r in baseline['results'])
+    for r in report['results']:
+        base = old.get((r['name'], r['links']))
+        if None is base:
+            continue
+        if 0 < base['seconds']:
+            ratio = r['seconds'] / base['seconds']
+            slower = threshold < ratio
+        else:
+            ratio = None
+            slower = False
+        yield r['name'], r['links'], base['seconds'], r['seconds'], ratio, (
+            slower)
+    return None
+
+
+def _format_optional(value, spec, width):
+    if None is value:
+        return '-'.rjust(width)
+    return format(value, spec)
+
+
+def main(args=None, namespace=None, *, outfile=None):
+    if None is outfile:
+        outfile = sys.stdout
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--benchmark', action='append',
+            choices=benchmarks.keys())
+    parser.add_argument('-s', '--size', type=int, action='append')
+    parser.add_argument('-a', '--addrs', type=int, default=4)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output')
+    parser.add_argument('-c', '--compare', type=argparse.FileType('r'))
+    parser.add_argument('-t', '--threshold', type=float, default=1.1)
+    namespace = parser.parse_args(args=args, namespace=namespace)
+    sizes = namespace.size
+    if None is sizes:
+        sizes = (100, 1000, 10000)
+    report = run(names=namespace.benchmark,
+                 sizes=sizes,
+                 naddrs=namespace.addrs,
+                 repeat=namespace.repeat,
+                 seed=namespace.seed)
+    if None is not namespace.output:
+        fileobj = open(namespace.output, 'w')
+        try:
+            json.dump(report, fileobj, indent=4)
+        finally:
+            fileobj.close()
+    regressions = 0
+    if None is namespace.compare:
+        for r in report['results']:
+            outfile.write('{:<20} {:>7d} {:>10.6f}s {}/s\n'.format(
+                r['name'], r['links'], r['seconds'],
+                _format_optional(r['rate'], '>12.0f', 12)))
+    else:
+        baseline = json.load(namespace.compare)
+        for name, links, old, new, ratio, slower in compare(
+                baseline, report, threshold=namespace.threshold):
+            regressions += slower
+            outfile.write('{:<20} {:>7d} {:>10.6f}s {:>10.6f}s {}x{}\n'
+                          .format(name, links, old, new,
+                                  _format_optional(ratio, '>6.2f', 6),
+                                  ' REGRESSION' if slower else ''))
+    return 1 if regressions else 0
+
+
+if '__main__' == __name__:
+    sys.exit(main())
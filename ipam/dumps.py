@@ -1,4 +1,4 @@
-__all__ = ('encode_link', 'encode_addr', 'iterencode')
+__all__ = ('encode_link', 'encode_addr', 'iterencode', 'iterencode_changes')
 
 import ctypes
 
@@ -6,13 +6,13 @@ from . import nltypes
 from . import utils
 
 
-def encode_link(link, link_attr, flags=0, seq=0):
+def encode_link(link, link_attr, flags=0, seq=0, type=nltypes.RTM_NEWLINK):
     nlmsg_len = nltypes.NLMSG_LENGTH(ctypes.sizeof(nltypes.c_ifinfomsg)) + sum(
         nltypes.RTA_SPACE(len(data)) for data in link_attr if None is not data)
     buf = (ctypes.c_ubyte * nlmsg_len)()
     nlh = nltypes.c_nlmsghdr.from_buffer(buf)
     nlh.nlmsg_len = nlmsg_len
-    nlh.nlmsg_type = nltypes.RTM_NEWLINK
+    nlh.nlmsg_type = type
     nlh.nlmsg_flags = flags
     nlh.nlmsg_seq = seq
     n = nltypes.IFLA_PAYLOAD(nlh)
@@ -35,13 +35,13 @@ def encode_link(link, link_attr, flags=0, seq=0):
     return bytes(buf)
 
 
-def encode_addr(addr, addr_attr, flags=0, seq=0):
+def encode_addr(addr, addr_attr, flags=0, seq=0, type=nltypes.RTM_NEWADDR):
     nlmsg_len = nltypes.NLMSG_LENGTH(ctypes.sizeof(nltypes.c_ifaddrmsg)) + sum(
         nltypes.RTA_SPACE(len(data)) for data in addr_attr if None is not data)
     buf = (ctypes.c_ubyte * nlmsg_len)()
     nlh = nltypes.c_nlmsghdr.from_buffer(buf)
     nlh.nlmsg_len = nlmsg_len
-    nlh.nlmsg_type = nltypes.RTM_NEWADDR
+    nlh.nlmsg_type = type
     nlh.nlmsg_flags = flags
     nlh.nlmsg_seq = seq
     n = nltypes.IFA_PAYLOAD(nlh)
@@ -70,3 +70,19 @@ def iterencode(link_list,  addr_list):
     for addr, addr_attr in addr_list:
         yield encode_addr(addr, addr_attr)
     return None
+
+
+def iterencode_changes(changes):
+    addr_changes = changes.addr_changes()
+    for old, new in addr_changes:
+        if None is new:
+            yield encode_addr(*old, type=nltypes.RTM_DELADDR)
+    for old, new in changes.link_changes():
+        if None is new:
+            yield encode_link(*old, type=nltypes.RTM_DELLINK)
+        else:
+            yield encode_link(*new)
+    for old, new in addr_changes:
+        if None is not new:
+            yield encode_addr(*new)
+    return None
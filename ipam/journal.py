@@ -0,0 +1,162 @@
+__all__ = ('MAGIC', 'VERSION', 'journal', 'is_journal', 'iter_journal')
+
+import os
+import time
+import struct
+
+from . import nltypes
+
+MAGIC = b'IPAMJRNL'
+VERSION = 1
+
+# magic, version
+header = struct.Struct('=8sI4x')
+# CLOCK_MONOTONIC timestamp in nanoseconds, datagram length
+record = struct.Struct('=QI4x')
+
+JOURNAL_MAX_BYTES = 64 << 20
+JOURNAL_BACKUP_COUNT = 3
+JOURNAL_BUFSIZE = 1 << 20
+JOURNAL_FLUSH_BYTES = 256 << 10
+JOURNAL_FLUSH_INTERVAL = 1
+
+# a lone NLMSG_OVERRUN stands for a receive error (ENOBUFS) at this point
+# of the stream, after which the cache was cleared and dumped again
+RESYNC = struct.pack('=IHHII', nltypes.NLMSG_HDRLEN, nltypes.NLMSG_OVERRUN,
+                     0, 0, 0)
+
+
+def is_journal(data):
+    return MAGIC == bytes(data[:len(MAGIC)])
+
+
+def iter_journal(fileobj):
+    data = fileobj.read(header.size)
+    if not data:
+        return None
+    if header.size != len(data):
+        raise ValueError
+    magic, version = header.unpack(data)
+    if MAGIC != magic or VERSION != version:
+        raise ValueError
+    while True:
+        data = fileobj.read(record.size)
+        if not data:
+            return None
+        if record.size != len(data):
+            raise ValueError
+        timestamp, length = record.unpack(data)
+        data = fileobj.read(length)
+        if length != len(data):
+            raise ValueError
+        yield timestamp, data
+    return None
+
+
+class journal(object):
+    def _open(self):
+        fileobj = open(self._filename, 'ab', buffering=self._bufsize)
+        try:
+            if 0 == fileobj.tell():
+                fileobj.write(header.pack(MAGIC, VERSION))
+            else:
+                f = open(self._filename, 'rb')
+                try:
+                    if not is_journal(f.read(len(MAGIC))):
+                        raise ValueError
+                finally:
+                    f.close()
+        except Exception:
+            fileobj.close()
+            raise
+        self._file = fileobj
+        self._size = fileobj.tell()
+        self._unflushed = 0
+        self._flushed = time.monotonic()
+        return None
+
+    def _rotate(self):
+        self._file.close()
+        if 0 < self._backup_count:
+            for i in range(self._backup_count - 1, 0, -1):
+                src = '{}.{}'.format(self._filename, i)
+                if os.path.exists(src):
+                    os.replace(src, '{}.{}'.format(self._filename, i + 1))
+            os.replace(self._filename, '{}.1'.format(self._filename))
+        else:
+            os.unlink(self._filename)
+        self._open()
+        self._rotations += 1
+        return None
+
+    def write(self, data, timestamp=None):
+        if None is timestamp:
+            timestamp = time.monotonic_ns()
+        size = record.size + len(data)
+        if (self._max_bytes < self._size + size
+                and header.size < self._size):
+            self._rotate()
+        self._file.write(record.pack(timestamp, len(data)))
+        self._file.write(data)
+        self._size += size
+        self._unflushed += size
+        if (self._flush_bytes <= self._unflushed or self._flush_interval
+                <= time.monotonic() - self._flushed):
+            self.flush()
+        return None
+
+    def write_resync(self, timestamp=None):
+        self.write(RESYNC, timestamp=timestamp)
+        self.flush()
+        return None
+
+    @property
+    def rotations(self):
+        return self._rotations
+
+    @property
+    def unflushed(self):
+        return self._unflushed
+
+    @property
+    def flush_interval(self):
+        return self._flush_interval
+
+    def flush(self):
+        self._file.flush()
+        self._unflushed = 0
+        self._flushed = time.monotonic()
+        return None
+
+    def close(self):
+        self._file.close()
+        return None
+
+    def __init__(self,
+                 filename,
+                 *,
+                 max_bytes=None,
+                 backup_count=None,
+                 bufsize=None,
+                 flush_bytes=None,
+                 flush_interval=None):
+        object.__init__(self)
+        if None is max_bytes:
+            max_bytes = JOURNAL_MAX_BYTES
+        if None is backup_count:
+            backup_count = JOURNAL_BACKUP_COUNT
+        if None is bufsize:
+            bufsize = JOURNAL_BUFSIZE
+        if None is flush_bytes:
+            flush_bytes = JOURNAL_FLUSH_BYTES
+        if None is flush_interval:
+            flush_interval = JOURNAL_FLUSH_INTERVAL
+        self._filename = filename
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._bufsize = bufsize
+        self._flush_bytes = flush_bytes
+        self._flush_interval = flush_interval
+        self._rotations = 0
+        self._open()
+        return None
@@ -1,78 +1,181 @@
 import sys
+import os
+import io
+import stat
+import mmap
 import ctypes
+import itertools
 import logging
 import json
 import argparse
 
-from . import add_l, remove_l, rtnl_addr, rtnl_link
+from . import rtnl_addr, rtnl_link, rtnl_cache
 from . import nltypes
+from . import nlparse
 from . import utils
 from . import prints
+from . import snapshot
+from . import journal
 
 logger = logging.getLogger(__package__)
 
 
+NL_READ_SIZE = 65536
+
+
+def map_fileobj(fileobj):
+    try:
+        fd = fileobj.fileno()
+        offset = fileobj.tell()
+        st = os.fstat(fd)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        return None
+    if not stat.S_ISREG(st.st_mode) or st.st_size <= offset:
+        return None
+    buf = mmap.mmap(fd, 0, access=mmap.ACCESS_COPY)
+    return memoryview(buf)[offset:]
+
+
+def _iter_c_nlmsghdr_in_buffer(buf):
+    n = len(buf)
+    off = 0
+    while n - off >= ctypes.sizeof(nltypes.c_nlmsghdr):
+        msg = nltypes.c_nlmsghdr.from_buffer(buf, off)
+        if not nltypes.NLMSG_OK(msg, n - off):
+            break
+        yield msg
+        off += nltypes.NLMSG_ALIGN(msg.nlmsg_len)
+    return min(off, n)
+
+
 def iter_nlmsg_in_fileobj(fileobj):
     if not isinstance(fileobj.read(0), bytes):
         raise TypeError
-    n = 0
-    buf = (ctypes.c_ubyte * 4096)()
+    buf = map_fileobj(fileobj)
+    if None is not buf:
+        n = yield from _iter_c_nlmsghdr_in_buffer(buf)
+        if n < len(buf):
+            raise ValueError
+        return None
+    pending = b''
+    size = NL_READ_SIZE
     while True:
-        if 0 < n:
-            ctypes.memmove(buf,
-                           ctypes.addressof(buf) + (ctypes.sizeof(buf) - n), n)
-        data = fileobj.read(ctypes.sizeof(buf) - n)
+        data = fileobj.read(size)
         if not data:
-            if 0 < n:
+            if pending:
                 raise ValueError
             return None
-        buf[n:n + len(data)] = data
-        n += len(data)
-        msg = nltypes.c_nlmsghdr.from_buffer(buf)
-        while nltypes.NLMSG_OK(msg, n):
-            yield msg
-            msg, n = nltypes.NLMSG_NEXT(msg, n)
+        buf = bytearray(pending + data)
+        n = yield from _iter_c_nlmsghdr_in_buffer(buf)
+        pending = bytes(buf[n:])
+        size = NL_READ_SIZE
+        if len(pending) >= ctypes.sizeof(nltypes.c_nlmsghdr):
+            nlmsg_len = nltypes.c_nlmsghdr.from_buffer_copy(
+                pending).nlmsg_len
+            size = max(size, nlmsg_len - len(pending))
     return None
 
 
-def main(args=None, namespace=None, *, outfile=None):
-    if None is outfile:
-        outfile = sys.stdout
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-b', '--brief', action='store_true')
-    parser.add_argument('-j', '--json', action='store_true')
-    parser.add_argument('-f', '--file', type=argparse.FileType('rb'))
-    parser.add_argument('-i', '--interface', action='append')
-    namespace = parser.parse_args(args=args, namespace=namespace)
-    if None is namespace.file or sys.stdin is namespace.file:
-        namespace.file = sys.stdin.buffer
-    link_list = list()
-    addr_list = list()
-    for msg in iter_nlmsg_in_fileobj(namespace.file):
+def _iter_nlmsg_in_buffer(iter_nlmsg, buf):
+    n = yield from iter_nlmsg(buf)
+    if n < len(buf):
+        raise ValueError
+    return None
+
+
+def load_nlmsg(fileobj, ifname=None, parser=None):
+    if None is parser or 'ctypes' == parser:
+        msgs = iter_nlmsg_in_fileobj(fileobj)
+    else:
+        buf = map_fileobj(fileobj)
+        if None is buf:
+            buf = fileobj.read()
+        msgs = _iter_nlmsg_in_buffer(nlparse.parsers[parser], buf)
+    return load_msgs(msgs, ifname=ifname)
+
+
+def load_journal(fileobj, ifname=None, parser=None):
+    if None is parser:
+        parser = 'ctypes'
+    msgs = itertools.chain.from_iterable(
+        map(nlparse.parsers[parser],
+            (data for timestamp, data in journal.iter_journal(fileobj))))
+    return load_msgs(msgs, ifname=ifname)
+
+
+def load_msgs(msgs, ifname=None):
+    cache = rtnl_cache()
+    for msg in msgs:
         if nltypes.RTM_NEWLINK == msg.nlmsg_type:
             x = rtnl_link(msg)
-            add_l(link_list, x)
+            cache.add_link(x)
             logger.debug('new: %r', x)
         elif nltypes.RTM_DELLINK == msg.nlmsg_type:
             x = rtnl_link(msg)
-            remove_l(link_list, x)
+            cache.remove_link(x)
             logger.debug('del: %r', x)
         elif nltypes.RTM_NEWADDR == msg.nlmsg_type:
             x = rtnl_addr(msg)
-            add_l(addr_list, x)
+            cache.add_addr(x)
             logger.debug('new: %r', x)
         elif nltypes.RTM_DELADDR == msg.nlmsg_type:
             x = rtnl_addr(msg)
-            remove_l(addr_list, x)
+            cache.remove_addr(x)
             logger.debug('del: %r', x)
+        elif nltypes.NLMSG_OVERRUN == msg.nlmsg_type:
+            cache.clear()
+            logger.debug('resync')
         else:
             logger.info('Unknown message: len=0x%08x type=0x%04x flag=0x%04x',
                         msg.nlmsg_len, msg.nlmsg_type, msg.nlmsg_flags)
+    index = None
+    if None is not ifname:
+        index = cache.find_index(ifname=ifname)
+    return cache.items(index=index)
+
+
+def load_snapshot(fileobj, ifname=None):
+    snap = snapshot.snapshot(fileobj)
+    try:
+        if None is ifname:
+            return snap.items()
+        records = sorted(
+            (record for record in map(snap.get_by_name, set(ifname))
+             if None is not record),
+            key=lambda record: record[0].ifi.ifi_index)
+    finally:
+        snap.close()
+    link_list = [link for link, addrs in records]
+    addr_list = [addr for link, addrs in records for addr in addrs]
+    return link_list, addr_list
+
+
+def main(args=None, namespace=None, *, outfile=None):
+    if None is outfile:
+        outfile = sys.stdout
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--brief', action='store_true')
+    parser.add_argument('-j', '--json', action='store_true')
+    parser.add_argument('-f', '--file', type=argparse.FileType('rb'))
+    parser.add_argument('-i', '--interface', action='append')
+    parser.add_argument('-p', '--parser', choices=nlparse.parsers.keys())
+    namespace = parser.parse_args(args=args, namespace=namespace)
+    if None is namespace.file or sys.stdin is namespace.file:
+        namespace.file = sys.stdin.buffer
+    magic = namespace.file.peek(len(snapshot.MAGIC))
+    if snapshot.is_snapshot(magic):
+        link_list, addr_list = load_snapshot(
+            namespace.file, ifname=namespace.interface)
+    elif journal.is_journal(magic):
+        link_list, addr_list = load_journal(namespace.file,
+                                            ifname=namespace.interface,
+                                            parser=namespace.parser)
+    else:
+        link_list, addr_list = load_nlmsg(namespace.file,
+                                          ifname=namespace.interface,
+                                          parser=namespace.parser)
     linkinfos = utils.iter_linkinfo(
-        link_list,
-        addr_list,
-        brief=namespace.brief,
-        ifname_set=namespace.interface)
+        link_list, addr_list, brief=namespace.brief)
     if namespace.json:
         json.dump(list(linkinfos), outfile, indent=4)
         if outfile.isatty():
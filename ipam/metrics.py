@@ -0,0 +1,145 @@
+__all__ = ('metrics', 'run_with_textfile')
+
+import os
+import time
+import asyncio
+import logging
+
+from . import nltypes
+
+logger = logging.getLogger(__package__)
+
+nlmsg_type_names = dict((t.value, t.name) for t in nltypes.nlmsg_types)
+nlmsg_type_names.update((
+    (nltypes.NLMSG_NOOP, 'NLMSG_NOOP'),
+    (nltypes.NLMSG_ERROR, 'NLMSG_ERROR'),
+    (nltypes.NLMSG_DONE, 'NLMSG_DONE'),
+    (nltypes.NLMSG_OVERRUN, 'NLMSG_OVERRUN'),
+))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{{{}}}'.format(','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+        for k, v in labels))
+
+
+class metrics(object):
+    def inc(self, name, value=1, labels=()):
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+        return None
+
+    def count_nlmsg(self, nlmsg_type):
+        name = nlmsg_type_names.get(nlmsg_type)
+        if None is name:
+            name = str(nlmsg_type)
+        self.inc('messages', labels=(('type', name), ))
+        return None
+
+    def observe(self, name, seconds):
+        count, total, peak = self._timings.get(name, (0, 0.0, 0.0))
+        self._timings[name] = (count + 1, total + seconds, max(peak, seconds))
+        return None
+
+    def set(self, name, value):
+        self._gauges[name] = value
+        return None
+
+    def gauge(self, name, func):
+        self._gauges[name] = func
+        return None
+
+    def snapshot(self):
+        counters = dict()
+        for (name, labels), value in self._counters.items():
+            counters.setdefault(name, dict())[labels] = value
+        gauges = dict(
+            (name, value() if callable(value) else value)
+            for name, value in self._gauges.items())
+        timings = dict(
+            (name, {'count': count, 'sum': total, 'max': peak})
+            for name, (count, total, peak) in self._timings.items())
+        return {'counters': counters, 'gauges': gauges, 'timings': timings}
+
+    def iterencode_prometheus(self, prefix='ipam'):
+        snapshot = self.snapshot()
+        for name, values in sorted(snapshot['counters'].items()):
+            name = '{}_{}_total'.format(prefix, name)
+            yield '# TYPE {} counter\n'.format(name)
+            for labels, value in sorted(values.items()):
+                yield '{}{} {}\n'.format(name, _format_labels(labels), value)
+        for name, value in sorted(snapshot['gauges'].items()):
+            name = '{}_{}'.format(prefix, name)
+            yield '# TYPE {} gauge\n'.format(name)
+            yield '{} {}\n'.format(name, value)
+        for name, value in sorted(snapshot['timings'].items()):
+            name = '{}_{}_seconds'.format(prefix, name)
+            yield '# TYPE {} summary\n'.format(name)
+            yield '{}_count {}\n'.format(name, value['count'])
+            yield '{}_sum {!r}\n'.format(name, value['sum'])
+            yield '# TYPE {}_max gauge\n'.format(name)
+            yield '{}_max {!r}\n'.format(name, value['max'])
+        return None
+
+    def write_textfile(self, filename, prefix='ipam'):
+        dirname, basename = os.path.split(filename)
+        tmpname = os.path.join(
+            dirname, '.{}.{}.tmp'.format(basename, os.getpid()))
+        fileobj = open(tmpname, 'w')
+        try:
+            try:
+                for chunk in self.iterencode_prometheus(prefix=prefix):
+                    fileobj.write(chunk)
+            finally:
+                fileobj.close()
+            os.replace(tmpname, filename)
+        except BaseException:
+            try:
+                os.unlink(tmpname)
+            except FileNotFoundError:
+                pass
+            raise
+        return None
+
+    def __init__(self):
+        object.__init__(self)
+        self._counters = dict()
+        self._gauges = dict()
+        self._timings = dict()
+        self.set('start_time_seconds', time.time())
+        return None
+
+
+async def _write_textfile_periodically(metrics, filename, interval, loop):
+    while True:
+        await asyncio.sleep(interval, loop=loop)
+        try:
+            metrics.write_textfile(filename)
+        except OSError as e:
+            logger.error('%s: %s', filename, e.strerror)
+    return None
+
+
+async def run_with_textfile(core,
+                            metrics,
+                            filename,
+                            interval=15,
+                            *,
+                            loop=None):
+    if None is loop:
+        loop = asyncio.get_event_loop()
+    writer = loop.create_task(
+        _write_textfile_periodically(metrics, filename, interval, loop))
+    try:
+        await core
+    finally:
+        writer.cancel()
+        try:
+            await writer
+        except asyncio.CancelledError:
+            pass
+        metrics.write_textfile(filename)
+    return None
@@ -0,0 +1,47 @@
+__all__ = ('setns', 'nl_open_in_netns', 'iter_netns')
+
+import os
+import ctypes
+
+from . import recvs
+
+CLONE_NEWNET = 0x40000000
+NETNS_RUN_DIR = '/var/run/netns'
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+def setns(fd, nstype=CLONE_NEWNET):
+    if 0 != _libc.setns(fd, nstype):
+        e = ctypes.get_errno()
+        raise OSError(e, os.strerror(e))
+    return None
+
+
+def nl_open_in_netns(path, sub=None, proto=None, rcvbuf=None):
+    self_fd = os.open('/proc/thread-self/ns/net', os.O_RDONLY)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            setns(fd)
+        finally:
+            os.close(fd)
+        try:
+            return recvs.nl_open(sub=sub, proto=proto, rcvbuf=rcvbuf)
+        finally:
+            setns(self_fd)
+    finally:
+        os.close(self_fd)
+
+
+def iter_netns(netns_dir=None, pids=()):
+    if None is not netns_dir:
+        try:
+            names = sorted(os.listdir(netns_dir))
+        except FileNotFoundError:
+            names = ()
+        for name in names:
+            yield name, os.path.join(netns_dir, name)
+    for pid in pids:
+        yield 'pid:{:d}'.format(pid), '/proc/{:d}/ns/net'.format(pid)
+    return None
@@ -0,0 +1,75 @@
+__all__ = ('nlmsg', 'iter_nlmsg', 'iter_c_nlmsghdr', 'iter_rtattr', 'parsers')
+
+import ctypes
+import struct
+import collections
+
+from . import nltypes
+
+nlmsghdr = struct.Struct('=IHHII')
+nlmsgerr = struct.Struct('=i')
+ifinfomsg = struct.Struct('=BxHiII')
+ifaddrmsg = struct.Struct('=BBBBI')
+rtattr = struct.Struct('=HH')
+
+IFLA_RTA = nltypes.NLMSG_HDRLEN + nltypes.NLMSG_ALIGN(ifinfomsg.size)
+IFA_RTA = nltypes.NLMSG_HDRLEN + nltypes.NLMSG_ALIGN(ifaddrmsg.size)
+
+nlmsg = collections.namedtuple(
+    'nlmsg',
+    ('nlmsg_len', 'nlmsg_type', 'nlmsg_flags', 'nlmsg_seq', 'nlmsg_pid',
+     'data'))
+
+
+def iter_nlmsg(buf, n=None):
+    data = memoryview(buf)
+    if None is n:
+        n = len(data)
+    unpack_from = nlmsghdr.unpack_from
+    off = 0
+    while n - off >= nlmsghdr.size:
+        hdr = unpack_from(data, off)
+        nlmsg_len = hdr[0]
+        if nlmsg_len < nlmsghdr.size or nlmsg_len > n - off:
+            break
+        yield nlmsg(*hdr, data[off:off + nlmsg_len])
+        off += nltypes.NLMSG_ALIGN(nlmsg_len)
+    return min(off, n)
+
+
+def iter_c_nlmsghdr(buf, n=None):
+    if not isinstance(buf, (bytearray, ctypes.Array)):
+        buf = bytearray(buf)
+    if None is n:
+        n = len(buf)
+    off = 0
+    while n - off >= nlmsghdr.size:
+        nlh = nltypes.c_nlmsghdr.from_buffer(buf, off)
+        if not nltypes.NLMSG_OK(nlh, n - off):
+            break
+        yield nlh
+        off += nltypes.NLMSG_ALIGN(nlh.nlmsg_len)
+    return min(off, n)
+
+
+def iter_rtattr(data, off):
+    unpack_from = rtattr.unpack_from
+    n = len(data)
+    while n - off >= rtattr.size:
+        rta_len, rta_type = unpack_from(data, off)
+        if rta_len < rtattr.size or rta_len > n - off:
+            break
+        yield (rta_type & nltypes.NLA_TYPE_MASK, off + rtattr.size,
+               off + rta_len)
+        off += nltypes.RTA_ALIGN(rta_len)
+    return None
+
+
+def nl_dump_error(msg):
+    return -nlmsgerr.unpack_from(msg.data, nltypes.NLMSG_HDRLEN)[0]
+
+
+parsers = {
+    'ctypes': iter_c_nlmsghdr,
+    'struct': iter_nlmsg,
+}
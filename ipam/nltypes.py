@@ -24,6 +24,10 @@ class c_nlmsghdr(ctypes.Structure):
     )
 
 
+SOL_NETLINK = 270
+
+NETLINK_GET_STRICT_CHK = 12
+
 NLM_F_REQUEST = 0x01
 NLM_F_MULTI = 0x02
 NLM_F_ROOT = 0x100
@@ -283,6 +287,10 @@ class c_rtattr(ctypes.Structure):
     )
 
 
+NLA_F_NESTED = 1 << 15
+NLA_F_NET_BYTEORDER = 1 << 14
+NLA_TYPE_MASK = ~(NLA_F_NESTED | NLA_F_NET_BYTEORDER)
+
 RTA_ALIGNTO = 4
 
 
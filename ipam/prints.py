@@ -1,7 +1,10 @@
-__all__ = ('iterencode_addrinfo', 'iterencode_linkinfo', 'iterencode')
+__all__ = ('iterencode_addrinfo', 'iterencode_linkinfo', 'encode_linkinfo',
+           'encode_json_linkinfo', 'encode_ndjson_linkinfo', 'iterencode')
 
 import itertools
 import functools
+import json
+import textwrap
 
 from . import utils
 
@@ -60,6 +63,8 @@ def iterencode_addrinfo(addrinfo, brief=False):
 
 
 def iterencode_linkinfo_brief(linkinfo, brief=False):
+    if linkinfo.get('deleted'):
+        yield 'Deleted '
     yield '{!s:16} '.format(linkinfo['ifname'])
     if 'operstate_index' in linkinfo:
         yield 'state {!s} '.format(linkinfo['operstate_index'])
@@ -75,6 +80,8 @@ def iterencode_linkinfo_brief(linkinfo, brief=False):
 def iterencode_linkinfo(linkinfo, brief=False):
     if brief:
         return (yield from iterencode_linkinfo_brief(linkinfo, brief))
+    if linkinfo.get('deleted'):
+        yield 'Deleted '
     yield '{!s}: '.format(linkinfo['ifindex'])
     yield '{!s}: '.format(linkinfo['ifname'])
     yield '<{!s}> '.format(','.join(linkinfo['flags']))
@@ -116,6 +123,20 @@ def iterencode_linkinfo(linkinfo, brief=False):
     return None
 
 
+def encode_linkinfo(linkinfo, brief=False):
+    return ''.join(iterencode_linkinfo(linkinfo, brief=brief))
+
+
+def encode_json_linkinfo(linkinfo, indent=4):
+    if None is indent:
+        return json.dumps(linkinfo)
+    return textwrap.indent(json.dumps(linkinfo, indent=indent), ' ' * indent)
+
+
+def encode_ndjson_linkinfo(linkinfo):
+    return json.dumps(linkinfo, separators=(',', ':'))
+
+
 def iterencode(linkinfos, brief=False):
     yield from itertools.chain.from_iterable(
         itertools.islice(
@@ -1,20 +1,34 @@
 __all__ = (
     'nl_strerror',
+    'nl_set_rcvbuf',
+    'nl_set_strict_chk',
     'nl_open',
+    'rtnl_groups',
     'Handle',
 )
 
+import os
 import enum
+import errno
 import ctypes
+import itertools
+import functools
+import collections
 import socket
 import logging
 import asyncio
 
-from . import (remove_l, add_l, filter_iter_link, filter_iter_addr, rtnl_addr, rtnl_link)
+from . import (filter_iter_link, rtnl_addr, rtnl_link, rtnl_cache)
 from . import nltypes
+from . import nlparse
 
 logger = logging.getLogger(__package__)
 
+SO_RCVBUFFORCE = getattr(socket, 'SO_RCVBUFFORCE', 33)
+
+NL_RECV_BUFSIZE = 32768
+NL_QUEUE_RECV_BUFSIZE = 4096
+
 
 class nl_errno(enum.IntEnum):
     NLE_SUCCESS = 0
@@ -94,24 +108,54 @@ nl_errmsg = {
 
 
 def nl_dump_error(nlh):
-    return -NLMSG_DATA(nlh, c_nlmsgerr).error
+    if isinstance(nlh, nlparse.nlmsg):
+        return nlparse.nl_dump_error(nlh)
+    return -nltypes.NLMSG_DATA(nlh, nltypes.c_nlmsgerr).error
 
 
 def nl_strerror(errno):
     return nl_errmsg.get(errno)
 
 
-def nl_open(sub=None, proto=None):
+def nl_set_rcvbuf(sock, size):
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, size)
+    except PermissionError:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+
+def nl_set_strict_chk(sock):
+    try:
+        sock.setsockopt(nltypes.SOL_NETLINK, nltypes.NETLINK_GET_STRICT_CHK, 1)
+    except OSError as e:
+        logger.info('NETLINK_GET_STRICT_CHK: %s', e.strerror)
+        return False
+    return True
+
+
+def nl_open(sub=None, proto=None, rcvbuf=None):
     if None is proto:
         proto = socket.NETLINK_ROUTE
     if None is sub:
         sub = 0
     sock = socket.socket(socket.AF_NETLINK,
                          socket.SOCK_RAW | socket.SOCK_CLOEXEC, proto)
-    sock.bind((socket.AF_NETLINK, sub))
+    if None is not rcvbuf:
+        nl_set_rcvbuf(sock, rcvbuf)
+    sock.bind((0, sub))
     return sock
 
 
+def rtnl_groups(family=None):
+    groups = nltypes.RTMGRP_LINK
+    if None is family or socket.AF_INET in family:
+        groups |= nltypes.RTMGRP_IPV4_IFADDR
+    if None is family or socket.AF_INET6 in family:
+        groups |= nltypes.RTMGRP_IPV6_IFADDR
+    return groups
+
+
 def rtnl_linkdump_req(seq, family=None):
     if None is family:
         family = socket.AF_PACKET
@@ -123,13 +167,39 @@ def rtnl_linkdump_req(seq, family=None):
     nlh.nlmsg_flags = nltypes.NLM_F_DUMP | nltypes.NLM_F_REQUEST
     nlh.nlmsg_seq = seq
     ifm = nltypes.NLMSG_DATA(nlh, nltypes.c_ifinfomsg)
-    ifm.ifa_family = family
+    ifm.ifi_family = family
+    return bytes(buf)
+
+
+def rtnl_getlink_req(seq, index=None, ifname=None):
+    if None is index:
+        index = 0
+    name = b'' if None is ifname else ifname.encode() + b'\0'
+    nlmsg_len = nltypes.NLMSG_LENGTH(ctypes.sizeof(nltypes.c_ifinfomsg))
+    if name:
+        nlmsg_len = nltypes.NLMSG_ALIGN(nlmsg_len) + nltypes.RTA_LENGTH(
+            len(name))
+    buf = (ctypes.c_ubyte * nltypes.NLMSG_ALIGN(nlmsg_len))()
+    nlh = nltypes.c_nlmsghdr.from_buffer(buf)
+    nlh.nlmsg_len = nlmsg_len
+    nlh.nlmsg_type = nltypes.RTM_GETLINK
+    nlh.nlmsg_flags = nltypes.NLM_F_REQUEST
+    nlh.nlmsg_seq = seq
+    ifm = nltypes.NLMSG_DATA(nlh, nltypes.c_ifinfomsg)
+    ifm.ifi_index = index
+    if name:
+        rta = nltypes.IFLA_RTA(ifm)
+        rta.rta_len = nltypes.RTA_LENGTH(len(name))
+        rta.rta_type = nltypes.IFLA_IFNAME
+        nltypes.RTA_DATA(rta, ctypes.c_ubyte * len(name))[:] = name
     return bytes(buf)
 
 
-def rtnl_addrdump_req(seq, family=None):
+def rtnl_addrdump_req(seq, family=None, index=None):
     if None is family:
         family = socket.AF_PACKET
+    if None is index:
+        index = 0
     buf = (ctypes.c_ubyte * nltypes.NLMSG_SPACE(
         ctypes.sizeof(nltypes.c_ifaddrmsg)))()
     nlh = nltypes.c_nlmsghdr.from_buffer(buf)
@@ -139,26 +209,58 @@ def rtnl_addrdump_req(seq, family=None):
     nlh.nlmsg_seq = seq
     ifm = nltypes.NLMSG_DATA(nlh, nltypes.c_ifaddrmsg)
     ifm.ifa_family = family
+    ifm.ifa_index = index
     return bytes(buf)
 
 
-async def nl_recv_and_put_in_queue(sock, queue, *, loop=None):
+async def nl_recv_and_put_in_queue(sock,
+                                   queue,
+                                   *,
+                                   journal=None,
+                                   metrics=None,
+                                   loop=None):
     if None is loop:
         loop = asyncio.get_event_loop()
-    buf = (ctypes.c_ubyte * 4096)()
+    buf = (ctypes.c_ubyte * NL_QUEUE_RECV_BUFSIZE)()
     n = 0
     while True:
         if 0 < n:
             logger.error('%r.recv with 0 < n: n = %d', sock, n)
-        n = await loop.sock_recv_into(sock, buf)
+        try:
+            n = await loop.sock_recv_into(sock, buf)
+        except OSError as e:
+            if errno.ENOBUFS != e.errno:
+                raise
+            n = 0
+            if None is not journal:
+                journal.write_resync()
+            await queue.put(e)
+            continue
+        if 0 == n:
+            await queue.put(EOFError())
+            return None
+        if None is not journal:
+            journal.write(memoryview(buf)[:n])
+        if None is not metrics:
+            metrics.inc('bytes_read', n)
         nlh = nltypes.c_nlmsghdr.from_buffer(buf)
         while nltypes.NLMSG_OK(nlh, n):
+            if nltypes.NLMSG_OVERRUN == nlh.nlmsg_type:
+                n = 0
+                await queue.put(
+                    OSError(errno.ENOBUFS, os.strerror(errno.ENOBUFS)))
+                break
             msg = bytes((ctypes.c_ubyte * nlh.nlmsg_len).from_address(
                 ctypes.addressof(nlh)))
             #logger.debug(
             #    '<queue at 0x%x qsize=%d>.put(<object at 0x%x>)',
             #    id(queue), queue.qsize(), id(msg))
-            await queue.put(msg)
+            if None is metrics:
+                await queue.put(msg)
+            else:
+                t = loop.time()
+                await queue.put(msg)
+                metrics.observe('queue_wait', loop.time() - t)
             #logger.debug(
             #    '<queue at 0x%x qsize=%d>.put(<object at 0x%x>) completed',
             #    id(queue), queue.qsize(), id(msg))
@@ -167,17 +269,116 @@ async def nl_recv_and_put_in_queue(sock, queue, *, loop=None):
     return None
 
 
+def nl_recv_and_put_in_deque(sock,
+                             pending,
+                             buf,
+                             iter_nlmsg=None,
+                             journal=None,
+                             metrics=None):
+    if None is iter_nlmsg:
+        iter_nlmsg = nlparse.iter_c_nlmsghdr
+    while True:
+        try:
+            n = sock.recv_into(buf)
+        except BlockingIOError:
+            break
+        except OSError as e:
+            if None is not journal and errno.ENOBUFS == e.errno:
+                journal.write_resync()
+            pending.append(e)
+            break
+        if 0 == n:
+            pending.append(EOFError())
+            break
+        if None is not journal:
+            journal.write(memoryview(buf)[:n])
+        if None is not metrics:
+            metrics.inc('bytes_read', n)
+        for nlh in iter_nlmsg(bytearray(memoryview(buf)[:n])):
+            if nltypes.NLMSG_OVERRUN == nlh.nlmsg_type:
+                pending.append(
+                    OSError(errno.ENOBUFS, os.strerror(errno.ENOBUFS)))
+                break
+            pending.append(nlh)
+    return None
+
+
+async def nl_dump(sock,
+                  reqs,
+                  *,
+                  iter_nlmsg=None,
+                  journal=None,
+                  metrics=None,
+                  loop=None):
+    if None is loop:
+        loop = asyncio.get_event_loop()
+    if None is iter_nlmsg:
+        iter_nlmsg = nlparse.iter_c_nlmsghdr
+    buf = bytearray(NL_RECV_BUFSIZE)
+    seq = int(loop.time())
+    msgs = list()
+    for req in reqs:
+        seq += 1
+        await loop.sock_sendall(sock, req(seq))
+        done = False
+        while not done:
+            n = await loop.sock_recv_into(sock, buf)
+            if None is not journal:
+                journal.write(memoryview(buf)[:n])
+            if None is not metrics:
+                metrics.inc('bytes_read', n)
+            for nlh in iter_nlmsg(bytearray(memoryview(buf)[:n])):
+                if seq != nlh.nlmsg_seq:
+                    continue
+                if nltypes.NLMSG_DONE == nlh.nlmsg_type:
+                    done = True
+                    break
+                msgs.append(nlh)
+                if nltypes.NLM_F_MULTI & ~nlh.nlmsg_flags:
+                    done = True
+                    break
+    if None is not journal:
+        journal.flush()
+    return msgs
+
+
 class Handle(object):
+    def _on_readable(self):
+        nl_recv_and_put_in_deque(self._sock, self._pending, self._buf,
+                                 self._iter_nlmsg, self._journal,
+                                 self._metrics)
+        if self._pending:
+            last = self._pending[-1]
+            if isinstance(last, EOFError) or (isinstance(last, OSError)
+                                              and errno.ENOBUFS != last.errno):
+                self._loop.remove_reader(self._sock.fileno())
+            self._readable.set()
+        return None
+
     async def _get_nlmsg(self):
+        if None is not self._pending:
+            while not self._pending:
+                self._readable.clear()
+                await self._readable.wait()
+            msg = self._pending.popleft()
+            if isinstance(msg, (OSError, EOFError)):
+                raise msg
+            if None is not self._metrics:
+                self._metrics.count_nlmsg(msg.nlmsg_type)
+            return msg
         #logger.debug(
         #      '<queue at 0x%x qsize=%d>.get()',
         #      id(self._queue), self._queue.qsize())
         msg = await self._queue.get()
+        if isinstance(msg, (OSError, EOFError)):
+            raise msg
         #logger.debug(
         #    '<queue at 0x%x qsize=%d>.get() answer <object at 0x%x>',
         #    id(self._queue), self._queue.qsize(), id(msg))
-        buf = (ctypes.c_ubyte * len(msg)).from_buffer_copy(msg)
-        return nltypes.c_nlmsghdr.from_buffer(buf)
+        msg = next(self._iter_nlmsg(msg))
+        if None is not self._metrics:
+            self._metrics.count_nlmsg(msg.nlmsg_type)
+        return msg
 
     async def _update(self, state=0):
         msg = await self._get_nlmsg()
@@ -194,34 +395,42 @@ class Handle(object):
                 break
             elif 0 is state:
                 if nltypes.RTM_NEWLINK == msg.nlmsg_type:
-                    add_l(self._link_list, rtnl_link(msg))
+                    self._add_link(rtnl_link(msg))
                 elif nltypes.RTM_DELLINK == msg.nlmsg_type:
-                    remove_l(self._link_list, rtnl_link(msg))
+                    self._cache.remove_link(rtnl_link(msg))
                 elif nltypes.RTM_NEWADDR == msg.nlmsg_type:
-                    add_l(self._addr_list, rtnl_addr(msg))
+                    self._add_addr(rtnl_addr(msg))
                 elif nltypes.RTM_DELADDR == msg.nlmsg_type:
-                    remove_l(self._addr_list, rtnl_addr(msg))
+                    self._cache.remove_addr(rtnl_addr(msg))
             elif 1 == state:
                 if nltypes.NLMSG_ERROR == msg.nlmsg_type:
-                    errno = nl_dump_error(msg)
-                    logger.error('NETLINK: %s (%d)', nl_strerror(errno), errno)
+                    err = nl_dump_error(msg)
+                    logger.error('NETLINK: %s (%d)', nl_strerror(err), err)
                 elif nltypes.RTM_NEWADDR == msg.nlmsg_type:
-                    add_l(self._addr_list, rtnl_addr(msg))
+                    self._add_addr(rtnl_addr(msg))
                 else:
                     logger.error(
                         'Unknown message: len=0x%08x type=0x%04x flag=0x%04x',
                         msg.nlmsg_len, msg.nlmsg_type, msg.nlmsg_flags)
             elif 2 == state:
                 if nltypes.RTM_NEWLINK == msg.nlmsg_type:
-                    add_l(self._link_list, rtnl_link(msg))
+                    self._add_link(rtnl_link(msg))
                 elif nltypes.RTM_DELLINK == msg.nlmsg_type:
-                    remove_l(self._link_list, rtnl_link(msg))
+                    self._cache.remove_link(rtnl_link(msg))
+                elif nltypes.RTM_NEWADDR == msg.nlmsg_type:
+                    self._add_addr(rtnl_addr(msg))
+                elif nltypes.RTM_DELADDR == msg.nlmsg_type:
+                    self._cache.remove_addr(rtnl_addr(msg))
             elif 3 == state:
-                if nltypes.NLMSG_ERROR == msg.nlmsg_type:
-                    errno = nl_dump_error(msg)
-                    logger.error('NETLINK: %s (%d)', nl_strerror(errno), errno)
+                if (nltypes.NLMSG_ERROR == msg.nlmsg_type
+                        and errno.ENODEV == nl_dump_error(msg)):
+                    logger.info('NETLINK: no such device (seq=%d)',
+                                msg.nlmsg_seq)
+                elif nltypes.NLMSG_ERROR == msg.nlmsg_type:
+                    err = nl_dump_error(msg)
+                    logger.error('NETLINK: %s (%d)', nl_strerror(err), err)
                 elif nltypes.RTM_NEWLINK == msg.nlmsg_type:
-                    add_l(self._link_list, rtnl_link(msg))
+                    self._add_link(rtnl_link(msg))
                 else:
                     logger.error(
                         'Unknown message: len=0x%08x type=0x%04x flag=0x%04x',
@@ -242,53 +451,264 @@ class Handle(object):
         return state
 
     async def update(self, pray=None):
+        try:
+            await self._do_update(pray)
+        finally:
+            self._schedule_flush()
+        return None
+
+    async def _do_update(self, pray):
         async with self._lock:
             if not self._sub:
                 if None is pray:
                     pray = True
                 elif not pray:
                     raise ValueError
-            if None is self._seq:
+            if None is self._seq and None is not self._pid:
                 pray = True
-            if pray:
-                state = 5
-                self.clear()
-                self._seq = int(self._loop.time())
+            if pray and None is self._pid:
+                raise ValueError
+            while True:
                 try:
-                    while 1 < state:
-                        if 5 == state:
-                            self._seq += 1
-                            await self._loop.sock_sendall(
-                                self._sock, rtnl_linkdump_req(self._seq))
-                            state -= 1
-                        elif 3 == state:
-                            self._seq += 1
-                            await self._loop.sock_sendall(
-                                self._sock, rtnl_addrdump_req(self._seq))
-                            state -= 1
-                        state = await self._update(state)
-                except asyncio.CancelledError:
-                    self._seq = None
+                    if pray:
+                        t = self._loop.time()
+                        if self._parallel:
+                            await self._dump_parallel()
+                        else:
+                            await self._dump()
+                        if None is not self._metrics:
+                            self._metrics.observe(
+                                'dump', self._loop.time() - t)
+                    else:
+                        await self._update()
+                        while self._pending:
+                            await self._update()
+                        if None is self._pid:
+                            self._refresh.clear()
+                        while self._refresh:
+                            await self._refresh_addrs()
+                except OSError as e:
+                    if errno.ENOBUFS != e.errno:
+                        raise
+                    self._resyncs += 1
+                    if None is not self._metrics:
+                        self._metrics.inc('resyncs')
+                    logger.warning('NETLINK: %s, resync #%d',
+                                   os.strerror(e.errno), self._resyncs)
+                    if None is self._pid:
+                        self._cache.clear()
+                    else:
+                        pray = True
+                else:
+                    break
+        return None
+
+    def _flush_journal(self):
+        self._flush_handle = None
+        self._journal.flush()
+        return None
+
+    def _schedule_flush(self):
+        journal = self._journal
+        if (None is journal or None is not self._flush_handle
+                or 0 == journal.unflushed):
+            return None
+        self._flush_handle = self._loop.call_later(
+            journal.flush_interval, self._flush_journal)
+        return None
+
+    async def _request(self, req, state):
+        self._seq += 1
+        await self._loop.sock_sendall(self._sock, req(self._seq))
+        while state in (4, 2):
+            state = await self._update(state)
+        return state
+
+    def _iter_linkdump_req(self):
+        if None is not self._ifname:
+            for ifname in sorted(self._ifname):
+                yield functools.partial(rtnl_getlink_req, ifname=ifname)
+        elif None is not self._index:
+            for index in sorted(self._index):
+                yield functools.partial(rtnl_getlink_req, index=index)
+        else:
+            yield rtnl_linkdump_req
+        return None
+
+    def _iter_addrdump_req(self, index=None, strict=None):
+        if None is strict:
+            strict = self._strict
+        family = (None, ) if None is self._family else sorted(self._family)
+        if None is self._ifname and None is self._index:
+            for f in family:
+                yield functools.partial(rtnl_addrdump_req, family=f)
+            return None
+        if not strict:
+            yield rtnl_addrdump_req
+            return None
+        if None is index:
+            index = list(link.key for link in self._cache.iter_links())
+        for i in sorted(index):
+            for f in family:
+                yield functools.partial(rtnl_addrdump_req, family=f, index=i)
+        return None
+
+    async def _dump(self):
+        self.clear()
+        self._seq = int(self._loop.time())
+        try:
+            for req in self._iter_linkdump_req():
+                await self._request(req, 4)
+            for req in self._iter_addrdump_req():
+                await self._request(req, 2)
+        except asyncio.CancelledError:
+            self._seq = None
+        self._refresh.clear()
+        return None
+
+    async def _refresh_addrs(self):
+        index = sorted(self._refresh)
+        self._refresh.clear()
+        for req in self._iter_addrdump_req(index):
+            await self._request(req, 2)
+        return None
+
+    def _apply_dump(self, msg):
+        if None is not self._metrics:
+            self._metrics.count_nlmsg(msg.nlmsg_type)
+        if nltypes.NLMSG_ERROR == msg.nlmsg_type:
+            err = nl_dump_error(msg)
+            if errno.ENODEV == err:
+                logger.info('NETLINK: no such device (seq=%d)',
+                            msg.nlmsg_seq)
+            else:
+                logger.error('NETLINK: %s (%d)', nl_strerror(err), err)
+        elif nltypes.RTM_NEWLINK == msg.nlmsg_type:
+            self._add_link(rtnl_link(msg))
+        elif nltypes.RTM_NEWADDR == msg.nlmsg_type:
+            self._add_addr(rtnl_addr(msg))
+        else:
+            logger.error('Unknown message: len=0x%08x type=0x%04x flag=0x%04x',
+                         msg.nlmsg_len, msg.nlmsg_type, msg.nlmsg_flags)
+        return None
+
+    async def _dump_parallel(self):
+        socks = list()
+        strict = False
+        try:
+            for _ in range(2):
+                sock = nl_open(proto=self._sock.proto)
+                sock.setblocking(False)
+                if None is not self._index or None is not self._ifname:
+                    strict = nl_set_strict_chk(sock)
+                socks.append(sock)
+            links = nl_dump(socks[0],
+                            self._iter_linkdump_req(),
+                            iter_nlmsg=self._iter_nlmsg,
+                            journal=self._journal,
+                            metrics=self._metrics,
+                            loop=self._loop)
+            if None is self._ifname:
+                addrs = nl_dump(socks[1],
+                                self._iter_addrdump_req(self._index, strict),
+                                iter_nlmsg=self._iter_nlmsg,
+                                journal=self._journal,
+                                metrics=self._metrics,
+                                loop=self._loop)
+                links, addrs = await asyncio.gather(links,
+                                                    addrs,
+                                                    loop=self._loop)
             else:
-                await self._update()
+                links = await links
+                index = set(ifi.ifi_index for ifi, _ in filter_iter_link(
+                    (rtnl_link(msg) for msg in links
+                     if nltypes.RTM_NEWLINK == msg.nlmsg_type),
+                    index=self._index,
+                    ifname=self._ifname))
+                addrs = await nl_dump(socks[1],
+                                      self._iter_addrdump_req(index, strict),
+                                      iter_nlmsg=self._iter_nlmsg,
+                                      journal=self._journal,
+                                      metrics=self._metrics,
+                                      loop=self._loop)
+        finally:
+            for sock in socks:
+                sock.close()
+        self.clear()
+        for msg in itertools.chain(links, addrs):
+            self._apply_dump(msg)
+        self._refresh.clear()
+        self._seq = int(self._loop.time())
         return None
 
+    def _add_link(self, link):
+        if None is self._ifname and None is self._index:
+            self._cache.add_link(link)
+        elif any(filter_iter_link((link, ), index=self._index,
+                                  ifname=self._ifname)):
+            if None is self._cache.get_link(link.key):
+                self._refresh.add(link.key)
+            self._cache.add_link(link)
+        else:
+            self._cache.remove_link(link)
+            for addr in self._cache.get_addrs(link.key):
+                self._cache.remove_addr(addr)
+            self._refresh.discard(link.key)
+        return None
+
+    def _add_addr(self, addr):
+        family = addr.ifa.ifa_family
+        if None is not self._family and family not in self._family:
+            pass
+        elif None is self._ifname and None is self._index:
+            self._cache.add_addr(addr)
+        elif None is not self._cache.get_link(addr.ifa.ifa_index):
+            self._cache.add_addr(addr)
+        return None
+
+    @property
+    def resyncs(self):
+        return self._resyncs
+
     def clear(self):
         self._seq = None
-        self._link_list.clear()
-        self._addr_list.clear()
+        self._cache.clear()
         return None
 
     def items(self,
             index=None,
             ifname=None,
             family=None):
-        index = set(ifi.ifi_index for ifi, _ in filter_iter_link(self._link_list, index=index, ifname=ifname))
-        links = filter_iter_link(self._link_list, index=index)
-        addrs = filter_iter_addr(self._addr_list, index=index, family=family)
-        return (links, addrs)
+        if None is not index or None is not ifname:
+            index = self._cache.find_index(index=index, ifname=ifname)
+        return self._cache.items(index=index, family=family)
+
+    def lookup(self, address):
+        return self._cache.lookup(address)
+
+    def covered_by(self, prefix):
+        return self._cache.covered_by(prefix)
+
+    def changes(self, index=None, ifname=None, family=None):
+        changes = self._cache.pop_changes()
+        if None is not index or None is not ifname:
+            deleted = (old for old, new in changes.link_changes()
+                       if None is new)
+            found = self._cache.find_index(index=index, ifname=ifname)
+            found.update(ifi.ifi_index for ifi, _ in filter_iter_link(
+                deleted, index=index, ifname=ifname))
+            index = found
+        elif None is family:
+            return changes
+        return changes.filter(index=index, family=family)
 
     async def close(self):
+        if None is not self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_journal()
+        if None is self._task:
+            self._loop.remove_reader(self._sock.fileno())
+            return None
         self._task.cancel()
         try:
             await self._task
@@ -296,25 +716,84 @@ class Handle(object):
             pass
         return None
 
-    def __init__(self, sub=None, proto=None, *, sock=None, loop=None):
+    def __init__(self,
+                 sub=None,
+                 proto=None,
+                 *,
+                 sock=None,
+                 rcvbuf=None,
+                 batch=False,
+                 parser=None,
+                 index=None,
+                 ifname=None,
+                 family=None,
+                 parallel=False,
+                 delta=False,
+                 lpm=False,
+                 journal=None,
+                 metrics=None,
+                 loop=None):
         if None is loop:
             loop = asyncio.get_event_loop()
         if None is sock:
-            sock = nl_open(sub=sub, proto=proto)
+            sock = nl_open(sub=sub, proto=proto, rcvbuf=rcvbuf)
             sock.setblocking(False)
-        elif None is not sub or None is not proto:
+        elif socket.AF_NETLINK == sock.family and None is not sub:
+            raise ValueError
+        elif None is not proto:
             raise ValueError
         elif sock.getblocking():
             raise ValueError
+        elif None is not rcvbuf:
+            nl_set_rcvbuf(sock, rcvbuf)
+        strict = False
+        if socket.AF_NETLINK != sock.family:
+            pass
+        elif None is not index or None is not ifname:
+            strict = nl_set_strict_chk(sock)
         object.__init__(self)
         self._loop = loop
         self._sock = sock
-        self._pid, self._sub = self._sock.getsockname()
-        self._queue = asyncio.Queue(maxsize=1, loop=self._loop)
-        self._task = self._loop.create_task(
-            nl_recv_and_put_in_queue(self._sock, self._queue, loop=self._loop))
+        if socket.AF_NETLINK == sock.family:
+            self._pid, self._sub = self._sock.getsockname()
+        else:
+            self._pid, self._sub = None, sub
+        if None is parser:
+            parser = 'ctypes'
+        self._iter_nlmsg = nlparse.parsers[parser]
+        self._journal = journal
+        self._flush_handle = None
+        self._metrics = metrics
+        if batch:
+            self._task = None
+            self._buf = bytearray(NL_RECV_BUFSIZE)
+            self._pending = collections.deque()
+            self._readable = asyncio.Event(loop=self._loop)
+            self._loop.add_reader(self._sock.fileno(), self._on_readable)
+        else:
+            self._pending = None
+            self._queue = asyncio.Queue(maxsize=1, loop=self._loop)
+            self._task = self._loop.create_task(
+                nl_recv_and_put_in_queue(self._sock,
+                                         self._queue,
+                                         journal=self._journal,
+                                         metrics=self._metrics,
+                                         loop=self._loop))
         self._lock = asyncio.Lock(loop=self._loop)
         self._seq = None
-        self._link_list = list()
-        self._addr_list = list()
+        self._index = index
+        self._ifname = ifname
+        self._family = family
+        self._parallel = parallel
+        self._strict = strict
+        self._refresh = set()
+        self._resyncs = 0
+        self._cache = rtnl_cache(track=delta, lpm=lpm)
+        if None is not metrics:
+            metrics.gauge('links', self._cache.count_links)
+            metrics.gauge('addrs', self._cache.count_addrs)
+            if batch:
+                metrics.gauge('pending', self._pending.__len__)
+            else:
+                metrics.gauge('queue_size', self._queue.qsize)
         return None
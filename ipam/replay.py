@@ -0,0 +1,78 @@
+__all__ = ('replay', 'replay_into')
+
+import asyncio
+import logging
+
+from . import nltypes
+from . import nlparse
+
+logger = logging.getLogger(__package__)
+
+
+def _iter_chunks(data, maxsize):
+    if None is maxsize or len(data) <= maxsize:
+        yield data
+        return None
+    view = memoryview(data)
+    start = off = 0
+    for msg in nlparse.iter_nlmsg(view):
+        end = min(len(view), off + nltypes.NLMSG_ALIGN(msg.nlmsg_len))
+        if maxsize < end - start and start < off:
+            yield view[start:off]
+            start = off
+        off = end
+    if start < len(view):
+        yield view[start:]
+    return None
+
+
+async def replay(records, sock, *, speed=None, maxsize=None, loop=None):
+    if None is loop:
+        loop = asyncio.get_event_loop()
+    n = 0
+    start = None
+    for timestamp, data in records:
+        if speed:
+            if None is start:
+                start = (loop.time(), timestamp)
+            delay = (start[0] + (timestamp - start[1]) / 1e9 / speed
+                     - loop.time())
+            if 0 < delay:
+                await asyncio.sleep(delay, loop=loop)
+        for chunk in _iter_chunks(data, maxsize):
+            await loop.sock_sendall(sock, chunk)
+        n += 1
+    return n
+
+
+async def _feed(records, sock, speed, maxsize, loop):
+    t = loop.time()
+    try:
+        n = await replay(
+            records, sock, speed=speed, maxsize=maxsize, loop=loop)
+    finally:
+        sock.close()
+    logger.info('replayed %d datagrams in %.3fs', n, loop.time() - t)
+    return n
+
+
+async def replay_into(core,
+                      records,
+                      sock,
+                      *,
+                      speed=None,
+                      maxsize=None,
+                      loop=None):
+    if None is loop:
+        loop = asyncio.get_event_loop()
+    feeder = loop.create_task(_feed(records, sock, speed, maxsize, loop))
+    try:
+        await core
+    finally:
+        if not feeder.done():
+            feeder.cancel()
+        try:
+            await feeder
+        except asyncio.CancelledError:
+            pass
+    return None
@@ -0,0 +1,181 @@
+__all__ = ('MAGIC', 'VERSION', 'iterencode', 'is_snapshot', 'snapshot')
+
+import io
+import ctypes
+import mmap
+import struct
+
+from . import rtnl_addr, rtnl_addr_view, rtnl_link
+from . import nltypes
+from . import nlparse
+from . import dumps
+
+MAGIC = b'IPAMSNAP'
+VERSION = 1
+
+# magic, version, count, ifindex index offset, ifname index offset
+header = struct.Struct('=8sIIQQ')
+# ifindex, record length, record offset
+index_entry = struct.Struct('=iIQ')
+# ifname, record length, record offset
+name_entry = struct.Struct('=16sIQ')
+
+
+def _get_ifname(link_attr):
+    name = link_attr[nltypes.IFLA_IFNAME]
+    if None is name:
+        return b''
+    return ctypes.string_at(name)
+
+
+def _iter_records(link_list, addr_list):
+    if isinstance(addr_list, rtnl_addr_view):
+        get_addrs = addr_list.get_addrs
+    else:
+        addr_tab = dict()
+        for _ in addr_list:
+            ifa, ifa_attr = _
+            addr_tab.setdefault(ifa.ifa_index, []).append(_)
+        get_addrs = addr_tab.get
+    for ifi, ifi_attr in link_list:
+        chunks = [dumps.encode_link(ifi, ifi_attr)]
+        chunks.extend(dumps.encode_addr(ifa, ifa_attr)
+                      for ifa, ifa_attr in get_addrs(ifi.ifi_index, ()))
+        yield ifi.ifi_index, _get_ifname(ifi_attr), b''.join(chunks)
+    return None
+
+
+def iterencode(link_list, addr_list):
+    records = list(_iter_records(link_list, addr_list))
+    index = list()
+    names = list()
+    offset = header.size
+    for ifindex, ifname, record in records:
+        index.append((ifindex, len(record), offset))
+        names.append((ifname, len(record), offset))
+        offset += len(record)
+    index.sort()
+    names.sort()
+    index_off = offset
+    names_off = index_off + index_entry.size * len(index)
+    yield header.pack(MAGIC, VERSION, len(records), index_off, names_off)
+    for ifindex, ifname, record in records:
+        yield record
+    for entry in index:
+        yield index_entry.pack(*entry)
+    for entry in names:
+        yield name_entry.pack(*entry)
+    return None
+
+
+def is_snapshot(data):
+    return MAGIC == bytes(data[:len(MAGIC)])
+
+
+class snapshot(object):
+    def _search(self, base, entry, key):
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if entry.unpack_from(self._mmap, base + mid * entry.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            found, length, offset = entry.unpack_from(
+                self._mmap, base + lo * entry.size)
+            if found == key:
+                return offset, length
+        return None
+
+    def _load(self, offset, length):
+        link = None
+        addrs = list()
+        for msg in nlparse.iter_nlmsg(self._mmap[offset:offset + length]):
+            if nltypes.RTM_NEWLINK == msg.nlmsg_type:
+                link = rtnl_link(msg)
+            elif nltypes.RTM_NEWADDR == msg.nlmsg_type:
+                addrs.append(rtnl_addr(msg))
+        return link, addrs
+
+    def get(self, ifindex, default=None):
+        found = self._search(self._index_off, index_entry, ifindex)
+        if None is found:
+            return default
+        return self._load(*found)
+
+    def get_by_name(self, ifname, default=None):
+        key = name_entry.pack(ifname.encode(), 0, 0)[:16]
+        found = self._search(self._names_off, name_entry, key)
+        if None is found:
+            return default
+        return self._load(*found)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            ifindex, length, offset = index_entry.unpack_from(
+                self._mmap, self._index_off + i * index_entry.size)
+            yield self._load(offset, length)
+        return None
+
+    def items(self):
+        link_list = list()
+        addr_list = list()
+        for link, addrs in self:
+            link_list.append(link)
+            addr_list.extend(addrs)
+        return link_list, addr_list
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return None
+
+    def _check(self, count, index_off, names_off):
+        size = len(self._mmap)
+        if not header.size <= index_off <= size:
+            raise ValueError
+        if names_off != index_off + index_entry.size * count:
+            raise ValueError
+        if size < names_off + name_entry.size * count:
+            raise ValueError
+        for base, entry in ((index_off, index_entry),
+                            (names_off, name_entry)):
+            for _, length, offset in entry.iter_unpack(
+                    self._mmap[base:base + entry.size * count]):
+                if offset < header.size or index_off < offset + length:
+                    raise ValueError
+        return None
+
+    def __init__(self, fileobj):
+        object.__init__(self)
+        try:
+            self._mmap = mmap.mmap(
+                fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, io.UnsupportedOperation):
+            self._mmap = fileobj.read()
+        try:
+            if len(self._mmap) < header.size:
+                raise ValueError
+            magic, version, count, index_off, names_off = header.unpack_from(
+                self._mmap, 0)
+            if MAGIC != magic or VERSION != version:
+                raise ValueError
+            self._check(count, index_off, names_off)
+        except Exception:
+            self.close()
+            raise
+        self._count = count
+        self._index_off = index_off
+        self._names_off = names_off
+        return None
@@ -0,0 +1,218 @@
+__all__ = ('prefix_trie', 'addr_trie', 'parse_prefix')
+
+import socket
+
+from . import nltypes
+
+family_bits = {
+        socket.AF_INET: 32,
+        socket.AF_INET6: 128,
+        }
+
+
+def parse_prefix(text):
+    address, sep, prefixlen = text.partition('/')
+    family = socket.AF_INET6 if ':' in address else socket.AF_INET
+    bits = family_bits[family]
+    try:
+        value = int.from_bytes(socket.inet_pton(family, address), 'big')
+    except OSError:
+        raise ValueError
+    if not sep:
+        return family, value, bits
+    prefixlen = int(prefixlen)
+    if not 0 <= prefixlen <= bits:
+        raise ValueError
+    shift = bits - prefixlen
+    return family, value >> shift << shift, prefixlen
+
+
+class _node(object):
+    __slots__ = ('prefix', 'prefixlen', 'children', 'values')
+
+    def __init__(self, prefix, prefixlen):
+        object.__init__(self)
+        self.prefix = prefix
+        self.prefixlen = prefixlen
+        self.children = [None, None]
+        self.values = dict()
+        return None
+
+
+class prefix_trie(object):
+    def _bit(self, value, i):
+        return (value >> (self._bits - 1 - i)) & 1
+
+    def _common(self, a, b, n):
+        if 0 == n:
+            return 0
+        diff = (a ^ b) >> (self._bits - n)
+        return n - diff.bit_length()
+
+    def _mask(self, value, n):
+        shift = self._bits - n
+        return value >> shift << shift
+
+    def _search(self, prefix, prefixlen):
+        path = list()
+        node = self._root
+        while None is not node and node.prefixlen < prefixlen:
+            if node.prefix != self._mask(prefix, node.prefixlen):
+                return path, None
+            path.append(node)
+            node = node.children[self._bit(prefix, node.prefixlen)]
+        if None is node or node.prefixlen != prefixlen or (
+                node.prefix != prefix):
+            return path, None
+        return path, node
+
+    def _link(self, parent, old, new):
+        if None is parent:
+            self._root = new
+        else:
+            parent.children[parent.children.index(old)] = new
+        return None
+
+    def add(self, prefix, prefixlen, key, value):
+        parent = None
+        node = self._root
+        while None is not node:
+            n = self._common(prefix, node.prefix,
+                             min(prefixlen, node.prefixlen))
+            if n < node.prefixlen:
+                break
+            if node.prefixlen == prefixlen:
+                if key not in node.values:
+                    self._len += 1
+                node.values[key] = value
+                return None
+            parent = node
+            node = node.children[self._bit(prefix, node.prefixlen)]
+        new = _node(prefix, prefixlen)
+        new.values[key] = value
+        self._len += 1
+        if None is node:
+            if None is parent:
+                self._root = new
+            else:
+                parent.children[self._bit(prefix, parent.prefixlen)] = new
+            return None
+        if n == prefixlen:
+            new.children[self._bit(node.prefix, n)] = node
+            self._link(parent, node, new)
+            return None
+        glue = _node(self._mask(prefix, n), n)
+        glue.children[self._bit(prefix, n)] = new
+        glue.children[self._bit(node.prefix, n)] = node
+        self._link(parent, node, glue)
+        return None
+
+    def remove(self, prefix, prefixlen, key):
+        path, node = self._search(prefix, prefixlen)
+        if None is node or key not in node.values:
+            return None
+        del node.values[key]
+        self._len -= 1
+        while None is not node and not node.values:
+            children = [child for child in node.children if None is not child]
+            if 1 < len(children):
+                break
+            parent = path.pop() if path else None
+            self._link(parent, node, children[0] if children else None)
+            node = parent
+        return None
+
+    def lookup(self, address):
+        best = None
+        node = self._root
+        while None is not node:
+            if node.prefix != self._mask(address, node.prefixlen):
+                break
+            if node.values:
+                best = node
+            if self._bits == node.prefixlen:
+                break
+            node = node.children[self._bit(address, node.prefixlen)]
+        if None is best:
+            return ()
+        return tuple(sorted(best.values.values()))
+
+    def covered_by(self, prefix, prefixlen):
+        node = self._root
+        while None is not node and node.prefixlen < prefixlen:
+            if node.prefix != self._mask(prefix, node.prefixlen):
+                return None
+            node = node.children[self._bit(prefix, node.prefixlen)]
+        if None is node or prefix != self._mask(node.prefix, prefixlen):
+            return None
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield from sorted(node.values.values())
+            stack.extend(child for child in reversed(node.children)
+                         if None is not child)
+        return None
+
+    def clear(self):
+        self._root = None
+        self._len = 0
+        return None
+
+    def __len__(self):
+        return self._len
+
+    def __init__(self, bits):
+        object.__init__(self)
+        self._bits = bits
+        self._root = None
+        self._len = 0
+        return None
+
+
+class addr_trie(object):
+    def _prefix(self, addr):
+        family = addr.ifa.ifa_family
+        address = addr.rta[nltypes.IFA_ADDRESS]
+        if family not in self._tries or None is address:
+            return None, None, None
+        prefixlen = addr.ifa.ifa_prefixlen
+        shift = family_bits[family] - prefixlen
+        prefix = int.from_bytes(address, 'big') >> shift << shift
+        return self._tries[family], prefix, prefixlen
+
+    def add_addr(self, addr):
+        trie, prefix, prefixlen = self._prefix(addr)
+        if None is not trie:
+            trie.add(prefix, prefixlen, addr.key, addr)
+        return None
+
+    def remove_addr(self, addr):
+        trie, prefix, prefixlen = self._prefix(addr)
+        if None is not trie:
+            trie.remove(prefix, prefixlen, addr.key)
+        return None
+
+    def lookup(self, address):
+        family, value, prefixlen = parse_prefix(address)
+        if family_bits[family] != prefixlen:
+            raise ValueError
+        return self._tries[family].lookup(value)
+
+    def covered_by(self, prefix):
+        family, value, prefixlen = parse_prefix(prefix)
+        return self._tries[family].covered_by(value, prefixlen)
+
+    def clear(self):
+        for trie in self._tries.values():
+            trie.clear()
+        return None
+
+    def __len__(self):
+        return sum(map(len, self._tries.values()))
+
+    def __init__(self):
+        object.__init__(self)
+        self._tries = dict(
+            (family, prefix_trie(bits))
+            for family, bits in family_bits.items())
+        return None
@@ -1,9 +1,12 @@
-__all__ = ('iter_linkinfo', 'iter_addrinfo')
+__all__ = ('get_linkinfo', 'iter_linkinfo', 'iter_addrinfo', 'render_cache',
+           'render_pool')
 
 import ctypes
 import socket
+import asyncio
 
-from . import filter_iter_link, filter_iter_addr
+from . import filter_iter_link, filter_iter_addr, rtnl_addr_view
+from . import _ifinfomsg, _ifaddrmsg, _rtatb
 from . import nltypes
 
 link_types = {
@@ -347,22 +350,238 @@ def iter_elements_by_ifaddrmsg(ifa, tb, brief=False):
     return None
 
 
+def _decode(iter_elements, hdr, tb, brief):
+    if not isinstance(tb, _rtatb):
+        return dict(iter_elements(hdr, tb, brief=brief))
+    memo = tb.memo
+    key = (hdr, brief)
+    try:
+        elements, lists = memo[key]
+    except KeyError:
+        elements = tuple(iter_elements(hdr, tb, brief=brief))
+        lists = tuple(name for name, value in elements
+                      if isinstance(value, list))
+        if lists:
+            elements = tuple(
+                (name, tuple(value) if isinstance(value, list) else value)
+                for name, value in elements)
+        memo[key] = elements, lists
+    info = dict(elements)
+    for name in lists:
+        info[name] = list(info[name])
+    return info
+
+
 def iter_addrinfo(addr_list, brief=False):
-    yield from (dict(iter_elements_by_ifaddrmsg(ifa, ifa_attr, brief=brief)) for ifa, ifa_attr in addr_list)
+    yield from (_decode(iter_elements_by_ifaddrmsg, ifa, ifa_attr, brief) for ifa, ifa_attr in addr_list)
     return None
 
 
+def get_linkinfo(link, addr_list, brief=False, deleted=False):
+    ifi, ifi_attr = link
+    linkinfo = _decode(iter_elements_by_ifinfomsg, ifi, ifi_attr, brief)
+    if deleted:
+        linkinfo['deleted'] = True
+    if addr_list:
+        linkinfo['addr_info'] = list(iter_addrinfo(addr_list, brief=brief))
+    return linkinfo
+
+
 def iter_linkinfo(link_list,
                   addr_list,
-                  brief=False):
-    addr_tab = dict()
-    for _ in addr_list:
-        ifa, ifa_attr = _
-        addr_tab.setdefault(ifa.ifa_index, []).append(_)
-    for ifi, ifi_attr in link_list:
-        linkinfo = dict(iter_elements_by_ifinfomsg(ifi, ifi_attr, brief=brief))
-        addr_list = addr_tab.pop(ifi.ifi_index, None)
-        if addr_list:
-            linkinfo['addr_info'] = list(iter_addrinfo(addr_list, brief=brief))
-        yield linkinfo
+                  brief=False,
+                  deleted=()):
+    if isinstance(addr_list, rtnl_addr_view):
+        get_addrs = addr_list.get_addrs
+    else:
+        addr_tab = dict()
+        for _ in addr_list:
+            ifa, ifa_attr = _
+            addr_tab.setdefault(ifa.ifa_index, []).append(_)
+        get_addrs = addr_tab.pop
+    for link in link_list:
+        ifindex = link[0].ifi_index
+        yield get_linkinfo(link,
+                           get_addrs(ifindex, None),
+                           brief=brief,
+                           deleted=ifindex in deleted)
     return None
+
+
+class render_cache(object):
+    def iter_render(self,
+                    render,
+                    link_list,
+                    addr_list,
+                    brief=False,
+                    deleted=()):
+        if not isinstance(addr_list, rtnl_addr_view):
+            yield from map(
+                render,
+                iter_linkinfo(link_list,
+                              addr_list,
+                              brief=brief,
+                              deleted=deleted))
+            return None
+        blocks = self._blocks
+        seen = list()
+        for link in link_list:
+            ifindex = link[0].ifi_index
+            seen.append(ifindex)
+            gen = (addr_list.generation(ifindex), brief, ifindex in deleted)
+            try:
+                block_gen, block = blocks[ifindex]
+            except KeyError:
+                pass
+            else:
+                if block_gen == gen:
+                    yield block
+                    continue
+            block = render(
+                get_linkinfo(link,
+                             addr_list.get_addrs(ifindex, None),
+                             brief=brief,
+                             deleted=gen[2]))
+            blocks[ifindex] = (gen, block)
+            yield block
+        if len(seen) < len(blocks):
+            self._blocks = dict((i, blocks[i]) for i in seen)
+        return None
+
+    async def render(self,
+                     render,
+                     link_list,
+                     addr_list,
+                     brief=False,
+                     deleted=(),
+                     *,
+                     loop=None):
+        return list(self.iter_render(
+            render, link_list, addr_list, brief=brief, deleted=deleted))
+
+    def __init__(self):
+        object.__init__(self)
+        self._blocks = dict()
+        return None
+
+
+RENDER_CHUNK_SIZE = 512
+
+
+def _pack_link(link, addrs, deleted):
+    ifi, ifi_attr = link
+    return (tuple(ifi), ifi_attr,
+            tuple((tuple(ifa), ifa_attr) for ifa, ifa_attr in addrs or ()),
+            deleted)
+
+
+def _render_chunk(render, brief, chunk):
+    return [
+        render(
+            get_linkinfo((_ifinfomsg._make(ifi), ifi_attr),
+                         [(_ifaddrmsg._make(ifa), ifa_attr)
+                          for ifa, ifa_attr in addrs],
+                         brief=brief,
+                         deleted=deleted))
+        for ifi, ifi_attr, addrs, deleted in chunk]
+
+
+class render_pool(render_cache):
+    def _iter_links(self, link_list, addr_list, brief, deleted):
+        if isinstance(addr_list, rtnl_addr_view):
+            for link in link_list:
+                ifindex = link[0].ifi_index
+                gen = (addr_list.generation(ifindex), brief,
+                       ifindex in deleted)
+                yield ifindex, gen, link, addr_list.get_addrs(ifindex, None)
+            return None
+        addr_tab = dict()
+        for _ in addr_list:
+            addr_tab.setdefault(_[0].ifa_index, []).append(_)
+        for link in link_list:
+            ifindex = link[0].ifi_index
+            yield ifindex, None, link, addr_tab.get(ifindex)
+        return None
+
+    def _plan(self, link_list, addr_list, brief, deleted):
+        blocks = self._blocks
+        items = list()
+        misses = list()
+        for ifindex, gen, link, addrs in self._iter_links(
+                link_list, addr_list, brief, deleted):
+            if None is not gen:
+                try:
+                    block_gen, block = blocks[ifindex]
+                except KeyError:
+                    pass
+                else:
+                    if block_gen == gen:
+                        items.append((ifindex, gen, block))
+                        continue
+            items.append((ifindex, gen, None))
+            misses.append(_pack_link(link, addrs, ifindex in deleted))
+        chunks = [misses[i:i + self._chunksize]
+                  for i in range(0, len(misses), self._chunksize)]
+        return items, chunks
+
+    def _assemble(self, items, rendered, addr_list):
+        blocks = self._blocks
+        seen = dict()
+        for ifindex, gen, block in items:
+            if None is block:
+                block = next(rendered)
+                if None is not gen:
+                    blocks[ifindex] = (gen, block)
+            if None is not gen:
+                seen[ifindex] = blocks[ifindex]
+            yield block
+        if isinstance(addr_list, rtnl_addr_view):
+            self._blocks = seen
+        return None
+
+    def iter_render(self,
+                    render,
+                    link_list,
+                    addr_list,
+                    brief=False,
+                    deleted=()):
+        items, chunks = self._plan(link_list, addr_list, brief, deleted)
+        if len(chunks) <= 1:
+            rendered = (block for chunk in chunks
+                        for block in _render_chunk(render, brief, chunk))
+        else:
+            futures = [
+                self._executor.submit(_render_chunk, render, brief, chunk)
+                for chunk in chunks]
+            rendered = (block for future in futures
+                        for block in future.result())
+        yield from self._assemble(items, rendered, addr_list)
+        return None
+
+    async def render(self,
+                     render,
+                     link_list,
+                     addr_list,
+                     brief=False,
+                     deleted=(),
+                     *,
+                     loop=None):
+        if None is loop:
+            loop = asyncio.get_event_loop()
+        items, chunks = self._plan(link_list, addr_list, brief, deleted)
+        if len(chunks) <= 1:
+            rendered = [block for chunk in chunks
+                        for block in _render_chunk(render, brief, chunk)]
+        else:
+            rendered = await asyncio.gather(
+                *(asyncio.wrap_future(self._executor.submit(
+                    _render_chunk, render, brief, chunk), loop=loop)
+                  for chunk in chunks), loop=loop)
+            rendered = [block for chunk in rendered for block in chunk]
+        return list(self._assemble(items, iter(rendered), addr_list))
+
+    def __init__(self, executor, chunksize=RENDER_CHUNK_SIZE):
+        render_cache.__init__(self)
+        self._executor = executor
+        self._chunksize = chunksize
+        return None
@@ -0,0 +1,279 @@
+__all__ = ('link_attr', 'addr_attr', 'retype', 'workload', 'iter_datagrams',
+           'send_datagrams', 'main')
+
+import sys
+import os
+import struct
+import socket
+import time
+import random
+import argparse
+
+from . import _ifaddrmsg, _ifinfomsg
+from . import nltypes
+from . import dumps
+from . import journal
+from . import recvs
+from . import replay
+
+IF_OPER_DOWN = 2
+IF_OPER_UP = 6
+
+LINK_FLAGS_UP = (nltypes.IFF_UP | nltypes.IFF_BROADCAST | nltypes.IFF_RUNNING
+                 | nltypes.IFF_MULTICAST | nltypes.IFF_LOWER_UP)
+LINK_FLAGS_DOWN = nltypes.IFF_BROADCAST | nltypes.IFF_MULTICAST
+
+INFINITY_LIFE_TIME = 0xffffffff
+
+
+def link_attr(ifindex, up=True):
+    tb = [None] * (1 + nltypes.IFLA_MAX)
+    tb[nltypes.IFLA_IFNAME] = 'veth{:d}'.format(ifindex).encode() + b'\0'
+    tb[nltypes.IFLA_MTU] = struct.pack('=I', 1500)
+    tb[nltypes.IFLA_OPERSTATE] = bytes((IF_OPER_UP if up else IF_OPER_DOWN, ))
+    tb[nltypes.IFLA_ADDRESS] = struct.pack('>HI', 0x0200, ifindex)
+    tb[nltypes.IFLA_BROADCAST] = b'\xff' * 6
+    tb[nltypes.IFLA_QDISC] = b'noqueue\0'
+    tb[nltypes.IFLA_TXQLEN] = struct.pack('=I', 1000)
+    tb[nltypes.IFLA_GROUP] = struct.pack('=I', 0)
+    return tb
+
+
+def addr_attr(family, address, label=None, valid_lft=None, preferred_lft=None):
+    if None is valid_lft:
+        valid_lft = INFINITY_LIFE_TIME
+    if None is preferred_lft:
+        preferred_lft = INFINITY_LIFE_TIME
+    tb = [None] * (1 + nltypes.IFA_MAX)
+    tb[nltypes.IFA_ADDRESS] = address
+    if socket.AF_INET == family:
+        tb[nltypes.IFA_LOCAL] = address
+    if None is not label:
+        tb[nltypes.IFA_LABEL] = label.encode() + b'\0'
+    tb[nltypes.IFA_CACHEINFO] = struct.pack(
+        '=IIII', preferred_lft, valid_lft, 100, 100)
+    return tb
+
+
+def retype(msg, type):
+    return msg[:4] + struct.pack('=H', type) + msg[6:]
+
+
+class workload(object):
+    def _new_addr(self, ifindex, family=None, temporary=False):
+        self._serial += 1
+        if None is family:
+            family = socket.AF_INET6
+            if self._random.random() < self._inet_ratio:
+                family = socket.AF_INET
+        if socket.AF_INET == family:
+            address = struct.pack('>I', 0x0a000000 + self._serial)
+            ifa = _ifaddrmsg(family, 32, nltypes.IFA_F_PERMANENT,
+                             nltypes.RT_SCOPE_UNIVERSE, ifindex)
+            attr = addr_attr(family, address,
+                             label='veth{:d}'.format(ifindex))
+        elif temporary:
+            address = struct.pack('>HHIQ', 0xfd00, 0, ifindex,
+                                  self._random.getrandbits(64))
+            ifa = _ifaddrmsg(family, 64, nltypes.IFA_F_TEMPORARY,
+                             nltypes.RT_SCOPE_UNIVERSE, ifindex)
+            attr = addr_attr(family, address, valid_lft=86400,
+                             preferred_lft=3600)
+        else:
+            address = struct.pack('>HHIQ', 0xfd00, 0, ifindex, self._serial)
+            ifa = _ifaddrmsg(family, 64, nltypes.IFA_F_PERMANENT,
+                             nltypes.RT_SCOPE_UNIVERSE, ifindex)
+            attr = addr_attr(family, address)
+        return dumps.encode_addr(ifa, attr)
+
+    def _new_link(self):
+        self._ifindex += 1
+        ifindex = self._ifindex
+        self._links[ifindex] = dumps.encode_link(
+            _ifinfomsg(socket.AF_UNSPEC, nltypes.ARPHRD_ETHER, ifindex,
+                       LINK_FLAGS_UP, 0), link_attr(ifindex))
+        self._addrs[ifindex] = [
+            self._new_addr(ifindex) for _ in range(self._naddrs)]
+        self._order.append(ifindex)
+        return ifindex
+
+    def _pick(self):
+        i = self._random.randrange(len(self._order))
+        return i, self._order[i]
+
+    def iter_dump(self):
+        for ifindex in self._order:
+            yield self._links[ifindex]
+        for ifindex in self._order:
+            yield from self._addrs[ifindex]
+        return None
+
+    def _flap(self):
+        i, ifindex = self._pick()
+        up = ifindex in self._down
+        if up:
+            self._down.remove(ifindex)
+        else:
+            self._down.add(ifindex)
+        self._links[ifindex] = dumps.encode_link(
+            _ifinfomsg(socket.AF_UNSPEC, nltypes.ARPHRD_ETHER, ifindex,
+                       LINK_FLAGS_UP if up else LINK_FLAGS_DOWN,
+                       nltypes.IFF_UP), link_attr(ifindex, up=up))
+        yield self._links[ifindex]
+        return None
+
+    def _rotate(self):
+        i, ifindex = self._pick()
+        addrs = self._addrs[ifindex]
+        old = self._temporary.pop(ifindex, None)
+        if None is not old:
+            addrs.remove(old)
+            yield retype(old, nltypes.RTM_DELADDR)
+        new = self._new_addr(ifindex, socket.AF_INET6, temporary=True)
+        addrs.append(new)
+        self._temporary[ifindex] = new
+        yield new
+        return None
+
+    def _bulk(self):
+        i, ifindex = self._pick()
+        for addr in self._addrs.pop(ifindex):
+            yield retype(addr, nltypes.RTM_DELADDR)
+        yield retype(self._links.pop(ifindex), nltypes.RTM_DELLINK)
+        self._temporary.pop(ifindex, None)
+        self._down.discard(ifindex)
+        del self._order[i]
+        ifindex = self._new_link()
+        yield self._links[ifindex]
+        yield from self._addrs[ifindex]
+        return None
+
+    def iter_churn(self, n):
+        if 0 < n and not self._order:
+            raise ValueError
+        ops = (self._flap, self._rotate, self._bulk)
+        for op in self._random.choices(ops, weights=self._weights, k=n):
+            yield b''.join(op())
+        return None
+
+    def __init__(self,
+                 nlinks,
+                 naddrs,
+                 *,
+                 seed=0,
+                 inet_ratio=0.5,
+                 weights=(1, 1, 1)):
+        object.__init__(self)
+        self._random = random.Random(seed)
+        self._naddrs = naddrs
+        self._inet_ratio = inet_ratio
+        self._weights = tuple(weights)
+        self._serial = 0
+        self._ifindex = 0
+        self._links = dict()
+        self._addrs = dict()
+        self._temporary = dict()
+        self._down = set()
+        self._order = list()
+        for _ in range(nlinks):
+            self._new_link()
+        return None
+
+
+def iter_datagrams(msgs, size=recvs.NL_RECV_BUFSIZE):
+    chunks = list()
+    n = 0
+    for msg in msgs:
+        if chunks and size < n + len(msg):
+            yield b''.join(chunks)
+            chunks.clear()
+            n = 0
+        chunks.append(msg)
+        n += len(msg)
+    if chunks:
+        yield b''.join(chunks)
+    return None
+
+
+def send_datagrams(sock, datagrams, rate=None, maxsize=None):
+    start = time.monotonic()
+    for i, datagram in enumerate(datagrams):
+        if rate:
+            delay = start + i / rate - time.monotonic()
+            if 0 < delay:
+                time.sleep(delay)
+        for chunk in replay._iter_chunks(datagram, maxsize):
+            sock.sendall(chunk)
+    return None
+
+
+def main(args=None, namespace=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-l', '--links', type=int, default=100)
+    parser.add_argument('-a', '--addrs', type=int, default=4)
+    parser.add_argument('-c', '--churn', type=int, default=0)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('--inet-ratio', type=float, default=0.5)
+    parser.add_argument('--flap', type=float, default=1)
+    parser.add_argument('--rotate', type=float, default=1)
+    parser.add_argument('--bulk', type=float, default=1)
+    parser.add_argument('-j', '--journal', action='store_true')
+    parser.add_argument('-r', '--rate', type=float, default=1000)
+    parser.add_argument('-o', '--output', default='-')
+    parser.add_argument('-u', '--unix')
+    parser.add_argument('--maxsize', type=int,
+            default=recvs.NL_QUEUE_RECV_BUFSIZE)
+    namespace = parser.parse_args(args=args, namespace=namespace)
+    if 0 < namespace.churn and namespace.links < 1:
+        parser.error('--churn needs at least one link')
+    wl = workload(namespace.links,
+                  namespace.addrs,
+                  seed=namespace.seed,
+                  inet_ratio=namespace.inet_ratio,
+                  weights=(namespace.flap, namespace.rotate, namespace.bulk))
+    if None is not namespace.unix:
+        if namespace.journal:
+            parser.error('--journal and --unix are exclusive')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            sock.connect(namespace.unix)
+            send_datagrams(sock,
+                           iter_datagrams(wl.iter_dump(),
+                                          size=namespace.maxsize),
+                           maxsize=namespace.maxsize)
+            send_datagrams(sock, wl.iter_churn(namespace.churn),
+                           rate=namespace.rate, maxsize=namespace.maxsize)
+        finally:
+            sock.close()
+        return None
+    if namespace.journal:
+        if '-' == namespace.output:
+            parser.error('--journal needs an output file')
+        if os.path.exists(namespace.output):
+            os.unlink(namespace.output)
+        jr = journal.journal(namespace.output, max_bytes=1 << 62)
+        try:
+            for datagram in iter_datagrams(wl.iter_dump()):
+                jr.write(datagram, timestamp=0)
+            for i, event in enumerate(wl.iter_churn(namespace.churn), 1):
+                jr.write(event, timestamp=int(i * 1e9 / namespace.rate))
+        finally:
+            jr.close()
+        return None
+    if '-' == namespace.output:
+        fileobj = sys.stdout.buffer
+    else:
+        fileobj = open(namespace.output, 'wb')
+    try:
+        for msg in wl.iter_dump():
+            fileobj.write(msg)
+        for event in wl.iter_churn(namespace.churn):
+            fileobj.write(event)
+    finally:
+        if sys.stdout.buffer is not fileobj:
+            fileobj.close()
+    return None
+
+
+if '__main__' == __name__:
+    main()
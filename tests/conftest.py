@@ -0,0 +1,39 @@
+import pytest
+
+from ipam import rtnl_addr, rtnl_link
+from ipam import nltypes
+from ipam import nlparse
+from ipam import workload
+
+
+def iter_objs(data):
+    for msg in nlparse.iter_nlmsg(data):
+        if msg.nlmsg_type in (nltypes.RTM_NEWLINK, nltypes.RTM_DELLINK):
+            yield msg.nlmsg_type, rtnl_link(msg)
+        elif msg.nlmsg_type in (nltypes.RTM_NEWADDR, nltypes.RTM_DELADDR):
+            yield msg.nlmsg_type, rtnl_addr(msg)
+    return None
+
+
+def apply(cache, nlmsg_type, x):
+    if nltypes.RTM_NEWLINK == nlmsg_type:
+        cache.add_link(x)
+    elif nltypes.RTM_DELLINK == nlmsg_type:
+        cache.remove_link(x)
+    elif nltypes.RTM_NEWADDR == nlmsg_type:
+        cache.add_addr(x)
+    elif nltypes.RTM_DELADDR == nlmsg_type:
+        cache.remove_addr(x)
+    return None
+
+
+def iter_stream(wl, n):
+    yield from iter_objs(b''.join(wl.iter_dump()))
+    for event in wl.iter_churn(n):
+        yield from iter_objs(event)
+    return None
+
+
+@pytest.fixture
+def wl():
+    return workload.workload(40, 3, seed=1)
@@ -0,0 +1,141 @@
+import random
+import socket
+
+from ipam import add_l, remove_l, rtnl_cache
+from ipam import nltypes
+
+from conftest import apply, iter_objs, iter_stream
+
+
+def _state(objs):
+    return [(tuple(hdr), list(attr)) for hdr, attr in objs]
+
+
+class _lists(object):
+    def apply(self, nlmsg_type, x):
+        if nltypes.RTM_NEWLINK == nlmsg_type:
+            add_l(self.links, x)
+        elif nltypes.RTM_DELLINK == nlmsg_type:
+            remove_l(self.links, x)
+        elif nltypes.RTM_NEWADDR == nlmsg_type:
+            add_l(self.addrs, x)
+        elif nltypes.RTM_DELADDR == nlmsg_type:
+            remove_l(self.addrs, x)
+        return None
+
+    def __init__(self):
+        object.__init__(self)
+        self.links = list()
+        self.addrs = list()
+        return None
+
+
+def _index(x):
+    return x.key if hasattr(x, 'ifi') else x.ifa.ifa_index
+
+
+def test_order_matches_lists(wl):
+    cache = rtnl_cache()
+    ref = _lists()
+    for nlmsg_type, x in iter_stream(wl, 300):
+        apply(cache, nlmsg_type, x)
+        ref.apply(nlmsg_type, x)
+    assert _state(ref.links) == _state(cache.iter_links())
+    assert _state(ref.addrs) == _state(cache.iter_addrs())
+    assert len(ref.links) == cache.count_links()
+    assert len(ref.addrs) == cache.count_addrs()
+    return None
+
+
+def test_filtered_order_matches_lists(wl):
+    cache = rtnl_cache()
+    ref = _lists()
+    for nlmsg_type, x in iter_stream(wl, 100):
+        apply(cache, nlmsg_type, x)
+        ref.apply(nlmsg_type, x)
+    rng = random.Random(0)
+    keys = [link.key for link in ref.links]
+    for k in (1, 5, len(keys)):
+        index = set(rng.sample(keys, k))
+        for family in (None, {socket.AF_INET}):
+            links, addrs = cache.items(index=index, family=family)
+            assert _state(x for x in ref.links if x.key in index) == (
+                _state(links))
+            assert _state(
+                x for x in ref.addrs if x.ifa.ifa_index in index
+                if None is family or x.ifa.ifa_family in family) == (
+                _state(addrs))
+    return None
+
+
+def test_generation(wl):
+    cache = rtnl_cache()
+    indexes = set()
+    for nlmsg_type, x in iter_stream(wl, 300):
+        ifindex = _index(x)
+        indexes.add(ifindex)
+        before = dict((i, cache.generation(i)) for i in indexes)
+        links = cache.count_links()
+        addrs = cache.count_addrs()
+        apply(cache, nlmsg_type, x)
+        changed = (nlmsg_type in (nltypes.RTM_NEWLINK, nltypes.RTM_NEWADDR)
+                   or links != cache.count_links()
+                   or addrs != cache.count_addrs())
+        after = dict((i, cache.generation(i)) for i in indexes)
+        if changed:
+            assert before.pop(ifindex) < after.pop(ifindex)
+        assert before == after
+    return None
+
+
+def test_changes(wl):
+    cache = rtnl_cache(track=True)
+    for nlmsg_type, x in iter_objs(b''.join(wl.iter_dump())):
+        apply(cache, nlmsg_type, x)
+    cache.pop_changes()
+    for _ in range(10):
+        old_links = dict((x.key, x) for x in cache.iter_links())
+        old_addrs = dict((x.key, x) for x in cache.iter_addrs())
+        for event in wl.iter_churn(10):
+            for nlmsg_type, x in iter_objs(event):
+                apply(cache, nlmsg_type, x)
+        new_links = dict((x.key, x) for x in cache.iter_links())
+        new_addrs = dict((x.key, x) for x in cache.iter_addrs())
+        changes = cache.pop_changes()
+        for old, new in changes.link_changes():
+            key = (old if None is new else new).key
+            assert old_links.get(key) is old
+            assert new_links.get(key) is new
+        for old, new in changes.addr_changes():
+            key = (old if None is new else new).key
+            assert old_addrs.get(key) is old
+            assert new_addrs.get(key) is new
+        changed = set(
+            key for key in set(old_links) | set(new_links)
+            if old_links.get(key) is not new_links.get(key))
+        assert changed == set(
+            (old if None is new else new).key
+            for old, new in changes.link_changes())
+        changed = set(
+            key for key in set(old_addrs) | set(new_addrs)
+            if old_addrs.get(key) is not new_addrs.get(key))
+        assert changed == set(
+            (old if None is new else new).key
+            for old, new in changes.addr_changes())
+        assert changes.deleted == set(old_links) - set(new_links)
+    return None
+
+
+def test_find_index(wl):
+    cache = rtnl_cache()
+    ref = _lists()
+    for nlmsg_type, x in iter_stream(wl, 100):
+        apply(cache, nlmsg_type, x)
+        ref.apply(nlmsg_type, x)
+    names = dict(
+        (bytes(x.rta[nltypes.IFLA_IFNAME]).rstrip(b'\0').decode(), x.key)
+        for x in ref.links)
+    for name, key in names.items():
+        assert {key} == cache.find_index(ifname=[name])
+    assert set() == cache.find_index(ifname=['missing'])
+    return None
@@ -0,0 +1,66 @@
+import os
+
+from ipam import rtnl_cache
+from ipam import journal
+from ipam import load
+
+from conftest import apply, iter_objs
+
+
+def _size(path):
+    return os.path.getsize(path)
+
+
+def test_buffered_until_threshold(tmp_path):
+    path = str(tmp_path / 'j.jrnl')
+    jr = journal.journal(path, flush_bytes=4096, flush_interval=3600)
+    try:
+        jr.flush()
+        size = _size(path)
+        for _ in range(10):
+            jr.write(b'x' * 100, timestamp=0)
+        assert size == _size(path)
+        assert 0 < jr.unflushed
+        jr.write(b'x' * 4096, timestamp=0)
+        assert 0 == jr.unflushed
+        assert size < _size(path)
+    finally:
+        jr.close()
+    return None
+
+
+def test_flush_on_interval(tmp_path):
+    path = str(tmp_path / 'j.jrnl')
+    jr = journal.journal(path, flush_bytes=1 << 30, flush_interval=0)
+    try:
+        jr.write(b'x' * 100, timestamp=0)
+        assert 0 == jr.unflushed
+    finally:
+        jr.close()
+    return None
+
+
+def test_resync_is_flushed_and_replayed(tmp_path, wl):
+    path = str(tmp_path / 'j.jrnl')
+    dump = b''.join(wl.iter_dump())
+    jr = journal.journal(path, flush_interval=3600)
+    try:
+        jr.write(dump, timestamp=0)
+        # events lost to an overflow, including bulk deletes
+        for event in wl.iter_churn(20):
+            pass
+        jr.write_resync()
+        assert 0 == jr.unflushed
+        jr.write(b''.join(wl.iter_dump()), timestamp=0)
+    finally:
+        jr.close()
+    cache = rtnl_cache()
+    for nlmsg_type, x in iter_objs(b''.join(wl.iter_dump())):
+        apply(cache, nlmsg_type, x)
+    with open(path, 'rb') as fileobj:
+        link_list, addr_list = load.load_journal(fileobj)
+        links = [tuple(ifi) for ifi, _ in link_list]
+        addrs = [tuple(ifa) for ifa, _ in addr_list]
+    assert [tuple(x.ifi) for x in cache.iter_links()] == links
+    assert [tuple(x.ifa) for x in cache.iter_addrs()] == addrs
+    return None
@@ -0,0 +1,78 @@
+import io
+
+import pytest
+
+from ipam import rtnl_addr, rtnl_link
+from ipam import nltypes
+from ipam import nlparse
+from ipam import load
+
+
+def _decode(msgs):
+    objs = list()
+    for msg in msgs:
+        if nltypes.RTM_NEWLINK == msg.nlmsg_type:
+            link = rtnl_link(msg)
+            objs.append((msg.nlmsg_type, tuple(link.ifi), list(link.rta)))
+        elif nltypes.RTM_NEWADDR == msg.nlmsg_type:
+            addr = rtnl_addr(msg)
+            objs.append((msg.nlmsg_type, tuple(addr.ifa), list(addr.rta)))
+        else:
+            objs.append((msg.nlmsg_type, msg.nlmsg_len))
+    return objs
+
+
+def test_struct_matches_ctypes(wl):
+    data = b''.join(wl.iter_dump()) + b''.join(wl.iter_churn(50))
+    expected = _decode(nlparse.iter_c_nlmsghdr(data))
+    assert expected
+    assert expected == _decode(nlparse.iter_nlmsg(data))
+    return None
+
+
+def test_headers_match_ctypes(wl):
+    data = b''.join(wl.iter_dump())
+    expected = [(nlh.nlmsg_len, nlh.nlmsg_type, nlh.nlmsg_flags,
+                 nlh.nlmsg_seq, nlh.nlmsg_pid)
+                for nlh in nlparse.iter_c_nlmsghdr(data)]
+    assert expected == [tuple(msg[:5]) for msg in nlparse.iter_nlmsg(data)]
+    return None
+
+
+@pytest.mark.parametrize('parser', sorted(nlparse.parsers))
+def test_consumed_length(wl, parser):
+    data = b''.join(wl.iter_dump())
+    gen = nlparse.parsers[parser](data)
+    with pytest.raises(StopIteration) as info:
+        while True:
+            next(gen)
+    assert len(data) == info.value.value
+    return None
+
+
+@pytest.mark.parametrize('parser', sorted(nlparse.parsers))
+@pytest.mark.parametrize('cut', (1, nltypes.NLMSG_HDRLEN + 3))
+def test_load_truncated(tmp_path, wl, parser, cut):
+    data = b''.join(wl.iter_dump())[:-cut]
+    with pytest.raises(ValueError):
+        load.load_nlmsg(io.BytesIO(data), parser=parser)
+    path = tmp_path / 'dump.bin'
+    path.write_bytes(data)
+    with open(path, 'rb') as fileobj:
+        with pytest.raises(ValueError):
+            load.load_nlmsg(fileobj, parser=parser)
+    return None
+
+
+@pytest.mark.parametrize('parser', sorted(nlparse.parsers))
+def test_load_complete(tmp_path, wl, parser):
+    data = b''.join(wl.iter_dump())
+    path = tmp_path / 'dump.bin'
+    path.write_bytes(data)
+    expected = sorted(
+        rtnl_link(msg).key for msg in nlparse.iter_nlmsg(data)
+        if nltypes.RTM_NEWLINK == msg.nlmsg_type)
+    with open(path, 'rb') as fileobj:
+        link_list, addr_list = load.load_nlmsg(fileobj, parser=parser)
+        assert expected == [ifi.ifi_index for ifi, _ in link_list]
+    return None
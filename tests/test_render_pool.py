@@ -0,0 +1,80 @@
+import functools
+import multiprocessing
+import concurrent.futures
+
+import pytest
+
+from ipam import rtnl_cache
+from ipam import prints
+from ipam import utils
+
+from conftest import apply, iter_objs, iter_stream
+
+renders = {
+    'tile': lambda brief: functools.partial(
+        prints.encode_linkinfo, brief=brief),
+    'json': lambda brief: functools.partial(
+        prints.encode_json_linkinfo, indent=4),
+    'ndjson': lambda brief: prints.encode_ndjson_linkinfo,
+}
+
+
+@pytest.fixture(scope='module')
+def executor():
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=2, mp_context=multiprocessing.get_context('forkserver'))
+    try:
+        yield executor
+    finally:
+        executor.shutdown()
+    return None
+
+
+def _serial(render, link_list, addr_list, brief=False, deleted=()):
+    return [render(linkinfo) for linkinfo in utils.iter_linkinfo(
+        link_list, addr_list, brief=brief, deleted=deleted)]
+
+
+@pytest.mark.parametrize('name', sorted(renders))
+@pytest.mark.parametrize('brief', (False, True))
+def test_lists_match_serial(wl, executor, name, brief):
+    render = renders[name](brief)
+    links = list()
+    addrs = list()
+    for nlmsg_type, x in iter_objs(b''.join(wl.iter_dump())):
+        (links if hasattr(x, 'ifi') else addrs).append(x)
+    pool = utils.render_pool(executor, chunksize=7)
+    expected = _serial(render, links, addrs, brief=brief)
+    assert expected == list(pool.iter_render(
+        render, links, addrs, brief=brief))
+    assert expected == list(pool.iter_render(
+        render, links, addrs, brief=brief))
+    return None
+
+
+@pytest.mark.parametrize('name', sorted(renders))
+def test_cache_matches_serial(wl, executor, name):
+    render = renders[name](False)
+    cache = rtnl_cache(track=True)
+    pool = utils.render_pool(executor, chunksize=7)
+    blocks = utils.render_cache()
+    for nlmsg_type, x in iter_stream(wl, 0):
+        apply(cache, nlmsg_type, x)
+    for i in range(5):
+        link_list, addr_list = cache.items()
+        expected = _serial(render, *cache.items())
+        assert expected == list(pool.iter_render(
+            render, link_list, addr_list))
+        link_list, addr_list = cache.items()
+        assert expected == list(blocks.iter_render(
+            render, link_list, addr_list))
+        changes = cache.pop_changes()
+        link_list, addr_list = changes.items()
+        expected = _serial(render, *changes.items(),
+                           deleted=changes.deleted)
+        assert expected == list(pool.iter_render(
+            render, link_list, addr_list, deleted=changes.deleted))
+        for event in wl.iter_churn(20):
+            for nlmsg_type, x in iter_objs(event):
+                apply(cache, nlmsg_type, x)
+    return None
@@ -0,0 +1,117 @@
+import io
+import struct
+
+import pytest
+
+from ipam import rtnl_cache
+from ipam import nltypes
+from ipam import snapshot
+from ipam import load
+
+from conftest import apply, iter_stream
+
+
+def _state(link_list, addr_list):
+    return ([(tuple(ifi), list(attr)) for ifi, attr in link_list],
+            [(tuple(ifa), list(attr)) for ifa, attr in addr_list])
+
+
+@pytest.fixture
+def cache(wl):
+    cache = rtnl_cache()
+    for nlmsg_type, x in iter_stream(wl, 100):
+        apply(cache, nlmsg_type, x)
+    return cache
+
+
+@pytest.fixture
+def path(tmp_path, cache):
+    path = tmp_path / 'state.snap'
+    path.write_bytes(b''.join(snapshot.iterencode(*cache.items())))
+    return path
+
+
+def test_round_trip(cache, path):
+    with open(path, 'rb') as fileobj:
+        assert snapshot.is_snapshot(fileobj.read(len(snapshot.MAGIC)))
+        with snapshot.snapshot(fileobj) as snap:
+            assert cache.count_links() == len(snap)
+            assert _state(*cache.items()) == _state(*snap.items())
+    return None
+
+
+def test_lists_round_trip(cache, tmp_path):
+    link_list = list(cache.iter_links())
+    addr_list = list(cache.iter_addrs())
+    path = tmp_path / 'lists.snap'
+    path.write_bytes(b''.join(snapshot.iterencode(link_list, addr_list)))
+    with open(path, 'rb') as fileobj:
+        with snapshot.snapshot(fileobj) as snap:
+            assert _state(link_list, addr_list) == _state(*snap.items())
+    return None
+
+
+def test_lookup(cache, path):
+    with open(path, 'rb') as fileobj:
+        with snapshot.snapshot(fileobj) as snap:
+            for link in cache.iter_links():
+                name = bytes(link.rta[nltypes.IFLA_IFNAME]).rstrip(b'\0')
+                expected = _state([link], cache.get_addrs(link.key))
+                found, addrs = snap.get(link.key)
+                assert expected == _state([found], addrs)
+                found, addrs = snap.get_by_name(name.decode())
+                assert expected == _state([found], addrs)
+            assert None is snap.get(0)
+            assert None is snap.get_by_name('missing')
+    return None
+
+
+def test_load_snapshot(cache, path):
+    with open(path, 'rb') as fileobj:
+        assert _state(*cache.items()) == _state(
+            *load.load_snapshot(fileobj))
+    names = ['veth3', 'veth1', 'missing']
+    index = cache.find_index(ifname=names)
+    assert index
+    with open(path, 'rb') as fileobj:
+        assert _state(*cache.items(index=index)) == _state(
+            *load.load_snapshot(fileobj, ifname=names))
+    return None
+
+
+def test_truncated(cache, tmp_path):
+    data = b''.join(snapshot.iterencode(*cache.items()))
+    path = tmp_path / 'short.snap'
+    for size in (len(snapshot.MAGIC), len(data) - 1):
+        path.write_bytes(data[:size])
+        with open(path, 'rb') as fileobj:
+            with pytest.raises(ValueError):
+                snapshot.snapshot(fileobj)
+    return None
+
+
+def test_stream(cache):
+    data = b''.join(snapshot.iterencode(*cache.items()))
+    with snapshot.snapshot(io.BytesIO(data)) as snap:
+        assert _state(*cache.items()) == _state(*snap.items())
+    return None
+
+
+def test_bad_offsets(cache):
+    data = b''.join(snapshot.iterencode(*cache.items()))
+    magic, version, count, index_off, names_off = snapshot.header.unpack_from(
+        data, 0)
+    # the length and offset fields of the first index and name entries
+    for off in (index_off + 4, names_off + 16):
+        for length, offset in ((1 << 20, snapshot.header.size), (8, 0),
+                               (8, index_off)):
+            bad = bytearray(data)
+            struct.pack_into('=IQ', bad, off, length, offset)
+            with pytest.raises(ValueError):
+                snapshot.snapshot(io.BytesIO(bytes(bad)))
+    bad = bytearray(data)
+    snapshot.header.pack_into(bad, 0, magic, version, count + 1, index_off,
+                              names_off)
+    with pytest.raises(ValueError):
+        snapshot.snapshot(io.BytesIO(bytes(bad)))
+    return None
@@ -0,0 +1,119 @@
+import random
+import socket
+
+import pytest
+
+from ipam import rtnl_cache
+from ipam import nltypes
+from ipam import trie
+
+from conftest import apply, iter_stream
+
+
+def _mask(value, prefixlen, bits):
+    shift = bits - prefixlen
+    return value >> shift << shift
+
+
+def _lookup(entries, address, bits):
+    found = [(prefixlen, value)
+             for (prefix, prefixlen, key), value in entries.items()
+             if _mask(address, prefixlen, bits) == prefix]
+    if not found:
+        return ()
+    best = max(prefixlen for prefixlen, value in found)
+    return tuple(sorted(value for prefixlen, value in found
+                        if best == prefixlen))
+
+
+def _covered_by(entries, prefix, prefixlen, bits):
+    return sorted(value
+                  for (p, plen, key), value in entries.items()
+                  if prefixlen <= plen
+                  if _mask(p, prefixlen, bits) == prefix)
+
+
+def _random_prefix(rng, bits):
+    prefixlen = rng.randint(0, bits)
+    # draw from a narrow range so that prefixes nest and share nodes
+    value = rng.getrandbits(6) << (bits - 6) | rng.getrandbits(3)
+    return _mask(value, prefixlen, bits), prefixlen
+
+
+@pytest.mark.parametrize('bits', (8, 32, 128))
+def test_prefix_trie_matches_brute_force(bits):
+    rng = random.Random(bits)
+    t = trie.prefix_trie(bits)
+    entries = dict()
+    for i in range(2000):
+        if entries and rng.random() < 0.4:
+            prefix, prefixlen, key = rng.choice(sorted(entries))
+            del entries[(prefix, prefixlen, key)]
+            t.remove(prefix, prefixlen, key)
+        else:
+            prefix, prefixlen = _random_prefix(rng, bits)
+            key = rng.randrange(3)
+            entries[(prefix, prefixlen, key)] = i
+            t.add(prefix, prefixlen, key, i)
+        assert len(entries) == len(t)
+        if 0 == i % 20:
+            for _ in range(20):
+                address, _ = _random_prefix(rng, bits)
+                address |= rng.getrandbits(bits - 6)
+                assert _lookup(entries, address, bits) == t.lookup(address)
+                prefix, prefixlen = _random_prefix(rng, bits)
+                assert _covered_by(entries, prefix, prefixlen, bits) == (
+                    sorted(t.covered_by(prefix, prefixlen)))
+    t.clear()
+    assert 0 == len(t)
+    assert () == t.lookup(0)
+    return None
+
+
+def test_remove_missing_is_noop():
+    t = trie.prefix_trie(32)
+    t.add(0x0a000000, 8, 'a', 1)
+    t.remove(0x0a000000, 8, 'b')
+    t.remove(0x0a000000, 16, 'a')
+    t.remove(0x0b000000, 8, 'a')
+    assert 1 == len(t)
+    assert (1, ) == t.lookup(0x0a010203)
+    return None
+
+
+def test_parse_prefix():
+    assert (socket.AF_INET, 0x0a000000, 8) == trie.parse_prefix('10.1.2.3/8')
+    assert (socket.AF_INET, 0x0a010203, 32) == trie.parse_prefix('10.1.2.3')
+    family, value, prefixlen = trie.parse_prefix('fd00::1/64')
+    assert (socket.AF_INET6, 0xfd00 << 112, 64) == (family, value, prefixlen)
+    for text in ('10.0.0.0/33', 'fd00::/129', 'bogus', '10.0.0.0/-1'):
+        with pytest.raises(ValueError):
+            trie.parse_prefix(text)
+    return None
+
+
+def test_cache_lookup_matches_brute_force(wl):
+    cache = rtnl_cache(lpm=True)
+    for nlmsg_type, x in iter_stream(wl, 200):
+        apply(cache, nlmsg_type, x)
+    entries = dict((family, dict()) for family in trie.family_bits)
+    probes = list()
+    for addr in cache.iter_addrs():
+        family = addr.ifa.ifa_family
+        bits = trie.family_bits[family]
+        value = int.from_bytes(addr.rta[nltypes.IFA_ADDRESS], 'big')
+        prefixlen = addr.ifa.ifa_prefixlen
+        prefix = _mask(value, prefixlen, bits)
+        entries[family][(prefix, prefixlen, addr.key)] = addr.key
+        probes.append((family, value, prefix, prefixlen))
+    assert probes
+    for family, value, prefix, prefixlen in probes:
+        bits = trie.family_bits[family]
+        address = socket.inet_ntop(family, value.to_bytes(bits // 8, 'big'))
+        assert _lookup(entries[family], value, bits) == tuple(
+            sorted(x.key for x in cache.lookup(address)))
+        network = '{}/{:d}'.format(socket.inet_ntop(
+            family, prefix.to_bytes(bits // 8, 'big')), prefixlen)
+        assert _covered_by(entries[family], prefix, prefixlen, bits) == (
+            sorted(x.key for x in cache.covered_by(network)))
+    return None